@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Bundle - package the scripts, data and prebuilt indexes into one .pyz, or the data alone into a pack
+Usage: python bundle.py [--out ux-kit.pyz] [--python "/usr/bin/env python3"] [--codec zlib|lzma|bz2]
+       python bundle.py --pack [--out ../data.pack] [--codec lzma|zlib|bz2] [--no-index]
+       python ux-kit.pyz "<query>" [search.py options]
+
+The archive holds the scripts (with bytecode for the building interpreter),
+the data tree under data/, and under index/ pre-parsed rows and fitted BM25
+indexes for every searchable table. core.py detects that it was imported from
+the archive and reads members in place, so nothing is extracted and no data
+file is opened at run time.
+
+A data pack is the same archive without scripts. core.py uses it when the
+data directory next to it is missing, so an install can ship data.pack
+instead of data/. Each data file and index segment is compressed on its own,
+so a query on one domain decompresses only that domain's members. lzma
+gives the smallest pack, zlib the fastest first query per domain, and
+--no-index leaves out the index segments (indexes are then built on first
+use, as with data/).
+"""
+
+import argparse
+import json
+import os
+import sys
+import stat
+import time
+import marshal
+import pickle
+import hashlib
+import zipfile
+import importlib.util
+from pathlib import Path
+
+from core import (
+    CSV_CONFIG, DATA_DIR, LOCAL_DATA_PACK, PLATFORM_FILES, STACK_CONFIG, BUNDLE_DATA, BUNDLE_INDEX,
+    KnowledgeBase, _bm25_key, _content_manifest
+)
+
+SCRIPTS_DIR = Path(__file__).parent
+DEFAULT_OUT = "ux-kit.pyz"
+DEFAULT_PYTHON = "/usr/bin/env python3"
+ENTRY_POINT = "search"
+CODECS = {"zlib": zipfile.ZIP_DEFLATED, "lzma": zipfile.ZIP_LZMA, "bz2": zipfile.ZIP_BZIP2}
+
+_MAIN = f'''# -*- coding: utf-8 -*-
+import runpy
+
+runpy.run_module("{ENTRY_POINT}", run_name="__main__")
+'''
+
+
+# ============ CONTENTS ============
+def _compile(source, name):
+    """Unchecked hash-based .pyc: zipimport loads it without comparing timestamps, and falls
+    back to the .py source on interpreters with a different bytecode magic"""
+    code = compile(source, name, "exec", dont_inherit=True)
+    flags = (0b01).to_bytes(4, "little")  # Hash-based, do not check the source
+    return importlib.util.MAGIC_NUMBER + flags + importlib.util.source_hash(source) + marshal.dumps(code)
+
+
+def _warm(kb):
+    """Run every search entry point once so kb holds each table (file, search columns) the kit uses"""
+    for domain in CSV_CONFIG:
+        kb.search("index", domain, 1)
+    for stack in STACK_CONFIG:
+        kb.search_stack("index", stack, 1)
+    kb.search_pattern("index", 1)
+    kb.search_platform("index", None, 1)
+    for platform in PLATFORM_FILES:
+        kb.search_platform("index", platform, 1)
+    return kb._tables
+
+
+def _script_members():
+    """{archive name: bytes} for the scripts, their bytecode and __main__.py"""
+    members = {}
+    for script in sorted(SCRIPTS_DIR.glob("*.py")):
+        if script.name == "__main__.py":
+            continue
+        source = script.read_bytes()
+        members[script.name] = source
+        members[f"{script.stem}.pyc"] = _compile(source, script.name)
+    members["__main__.py"] = _MAIN.encode()
+    return members
+
+
+def _data_members(stats, index=True):
+    """{archive name: bytes} for the data tree, parsed rows, BM25 indexes and the manifest"""
+    manifest = _content_manifest(DATA_DIR)
+    version = hashlib.sha256("".join(f"{rel}:{d}\n" for rel, d in manifest.items()).encode()).hexdigest()[:24]
+    members, sizes = {}, {}
+    for rel in manifest:
+        data = (DATA_DIR / rel).read_bytes()
+        members[f"{BUNDLE_DATA}/{rel}"] = data
+        sizes[rel] = len(data)
+        stats["data_files"] += 1
+
+    parsed = set()
+    tables = _warm(KnowledgeBase()) if index else {}
+    for (file, search_cols), table in tables.items():
+        if file not in parsed:
+            members[f"{BUNDLE_INDEX}/rows/{file}.pickle"] = pickle.dumps(table.rows, pickle.HIGHEST_PROTOCOL)
+            parsed.add(file)
+            stats["rows"] += 1
+        members[f"{BUNDLE_INDEX}/bm25/{_bm25_key(file, search_cols)}.pickle"] = pickle.dumps(table.bm25(), pickle.HIGHEST_PROTOCOL)
+        stats["bm25"] += 1
+
+    info = {"version": version, "files": sizes, "built": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0]}
+    members[f"{BUNDLE_INDEX}/manifest.json"] = json.dumps(info, sort_keys=True).encode()
+    stats["version"] = version
+    return members
+
+
+def build(out=DEFAULT_OUT, python=DEFAULT_PYTHON, codec="zlib", pack=False, index=True):
+    """Write the zipapp (or, with pack, the data-only archive); returns a summary of what went in"""
+    started = time.perf_counter()
+    stats = {"scripts": 0, "data_files": 0, "rows": 0, "bm25": 0}
+    scripts = {} if pack else _script_members()
+    stats["scripts"] = sum(name.endswith(".py") and name != "__main__.py" for name in scripts)
+    data = _data_members(stats, index)
+
+    out = Path(out)
+    raw = sum(len(v) for v in data.values())
+    tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        if not pack and python:
+            f.write(b"#!" + python.encode() + b"\n")
+        with zipfile.ZipFile(f, "w") as zf:
+            for name, content in scripts.items():  # zipimport only reads stored or deflated modules
+                zf.writestr(name, content, compress_type=zipfile.ZIP_DEFLATED)
+            for name, content in data.items():
+                zf.writestr(name, content, compress_type=CODECS[codec])
+    if not pack and python:
+        tmp.chmod(tmp.stat().st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    os.replace(tmp, out)
+
+    return {"out": str(out), "kind": "pack" if pack else "zipapp", "codec": codec,
+            "size_kb": round(out.stat().st_size / 1024, 1), "data_kb": round(raw / 1024, 1),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1), **stats}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UI Pro Max Bundle Builder")
+    parser.add_argument("--pack", action="store_true", help=f"Build a data-only pack (default out: {LOCAL_DATA_PACK})")
+    parser.add_argument("--out", "-o", help=f"Output archive (default: {DEFAULT_OUT})")
+    parser.add_argument("--python", default=DEFAULT_PYTHON, help=f"Shebang interpreter (default: {DEFAULT_PYTHON})")
+    parser.add_argument("--codec", choices=list(CODECS), help="Compression of data and index members (default: zlib, lzma for --pack)")
+    parser.add_argument("--no-index", action="store_true", help="Leave out pre-parsed rows and BM25 indexes")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    args = parser.parse_args()
+
+    out = args.out or (LOCAL_DATA_PACK if args.pack else DEFAULT_OUT)
+    codec = args.codec or ("lzma" if args.pack else "zlib")
+    try:
+        result = build(out, args.python, codec, args.pack, not args.no_index)
+    except OSError as e:
+        print(f"Error: {e}")
+        return 1
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"Built {result['kind']} {result['out']} ({result['size_kb']} KB, {result['codec']}; "
+              f"data + indexes {result['data_kb']} KB raw, version {result['version']}) in {result['elapsed_ms']} ms: "
+              f"{result['scripts']} scripts, {result['data_files']} data files, "
+              f"{result['rows']} parsed tables, {result['bm25']} BM25 indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,20 +5,94 @@ UI/UX Pro Max Core - BM25 search engine for UI/UX style guides
 """
 
 import csv
+import io
+import os
+import copy
+import mmap
+import random
+import operator
 import re
 import json
+import time
+import heapq
+import bisect
+import shutil
+import pickle
+import hashlib
+import zipfile
+import zipimport
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from math import log
-from collections import defaultdict
+from types import SimpleNamespace
+from math import log, sqrt
+from array import array
+from collections import defaultdict, deque, OrderedDict
 
 # ============ CONFIGURATION ============
-DATA_DIR = Path(__file__).parent.parent / "data"
+LOCAL_DATA_DIR = Path(__file__).parent.parent / "data"
+LOCAL_DATA_PACK = LOCAL_DATA_DIR.with_suffix(".pack")  # Used when the data directory is absent (see bundle.py --pack)
 MAX_RESULTS = 3
+CACHE_DIR = Path(os.environ.get("UX_KIT_CACHE_DIR") or
+                 Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "cross-platform-ux-kit")
 
+# Opt-in: serve data from one content-addressed copy shared by every installed skill
+SHARED_STORE = os.environ.get("UX_KIT_SHARED_STORE", "") not in ("", "0")
+
+# Cursor pagination: ranked hits kept per cursor, live cursors kept, seconds until expiry,
+# seconds between scans of the saved-cursor directory
+CURSOR_DEPTH = 50
+CURSOR_MAX_LIVE = 64
+CURSOR_TTL = 600
+CURSOR_PRUNE_EVERY = 60
+TOKEN_MAX_RESULTS = 20
+
+# Multi-stack search: rows from different stacks whose search-column terms overlap this much (Jaccard) are collapsed
+COLLAPSE_SIMILARITY = 0.6
+
+# Compare matrix: a guideline aligns with another platform's row when term overlap (Jaccard),
+# plus a bonus for the same Category, reaches ALIGN_MIN_SCORE
+ALIGN_CATEGORY_BONUS = 0.3
+ALIGN_MIN_SCORE = 0.3
+ALIGN_CANDIDATES = 3  # Counterparts kept per platform, so later matrix rows can avoid repeating a cell
+
+# Ranking engines: lexical BM25, latent semantic (LSA), or a weighted fusion of both
+ENGINES = ["bm25", "lsa", "hybrid"]
+BM25_K1 = 1.5
+BM25_B = 0.75
+IMPACT_CHECK_EVERY = 16  # Postings consumed between early-stopping checks
+LSA_DIMENSIONS = 48
+LSA_OVERSAMPLE = 8  # Extra sketch columns beyond LSA_DIMENSIONS for the randomized SVD
+LSA_POWER_ITERATIONS = 8
+LSA_MIN_SCORE = 0.15
+HYBRID_WEIGHT = 0.6  # Share of the fused score taken by normalized BM25
+
+# Text analyzers: applied identically to documents and queries. `min_length` drops shorter
+# tokens unless listed in `short_terms`; `fold` strips accents (NFKD); `split_identifiers`
+# also indexes the parts of hyphenated, snake_case and camelCase tokens (p-4, onValueChange).
+# Give a domain "code" only when its search columns hold code (class strings, implementations):
+# split names (CopyButton, closeButton) would match as often as the exact name and outrank it.
+SHORT_TERMS = ["ui", "ux", "ai", "ar", "vr", "xr", "2d", "3d", "rn", "js", "ts", "os", "tv", "qr",
+               "h1", "h2", "h3", "h4", "h5", "h6", "ml", "id"]
+ANALYZERS = {
+    "text": {"min_length": 3, "short_terms": SHORT_TERMS, "fold": True, "split_identifiers": False},
+    "code": {"min_length": 3, "short_terms": SHORT_TERMS, "fold": True, "split_identifiers": True},
+}
+DEFAULT_ANALYZER = "text"
+
+# Autocomplete: title column per domain (default: first output column), boost for titles, result count
+SUGGEST_TITLE_COLS = {"ux": "Issue", "icons": "Icon Name", "stack": "Guideline", "platform": "Guideline"}
+SUGGEST_TITLE_BOOST = 5
+SUGGEST_LIMIT = 8
+
+# `facet_cols`: columns --facets counts by default, short labels that repeat across rows
+# (free-text columns such as Era/Origin or Performance stay out even with few values)
 CSV_CONFIG = {
     "style": {
         "file": "styles.csv",
         "search_cols": ["Style Category", "Keywords", "Best For", "Type"],
+        "facet_cols": ["Type", "Light Mode ✓", "Dark Mode ✓", "Mobile-Friendly", "Conversion-Focused", "Complexity"],
         "output_cols": ["Style Category", "Type", "Keywords", "Primary Colors", "Effects & Animation", "Best For", "Performance", "Accessibility", "Framework Compatibility", "Complexity"]
     },
     "prompt": {
@@ -49,31 +123,39 @@ CSV_CONFIG = {
     "ux": {
         "file": "ux-guidelines.csv",
         "search_cols": ["Category", "Issue", "Description", "Platform"],
+        "facet_cols": ["Category", "Platform", "Severity"],
         "output_cols": ["Category", "Issue", "Platform", "Description", "Do", "Don't", "Code Example Good", "Code Example Bad", "Severity"]
     },
     "typography": {
         "file": "typography.csv",
         "search_cols": ["Font Pairing Name", "Category", "Mood/Style Keywords", "Best For", "Heading Font", "Body Font"],
+        "facet_cols": ["Category"],
         "output_cols": ["Font Pairing Name", "Category", "Heading Font", "Body Font", "Mood/Style Keywords", "Best For", "Google Fonts URL", "CSS Import", "Tailwind Config", "Notes"]
     },
     "icons": {
         "file": "icons.csv",
         "search_cols": ["Category", "Icon Name", "Keywords", "Best For"],
+        "facet_cols": ["Category", "Library", "Style"],
         "output_cols": ["Category", "Icon Name", "Keywords", "Library", "Import Code", "Usage", "Best For", "Style"]
     },
     "component": {
         "file": "components/shadcn-components.csv",
         "search_cols": ["Component", "Category", "Variants", "Key Props", "Accessibility"],
+        "facet_cols": ["Category"],
         "output_cols": ["Component", "Category", "Variants", "Key Props", "Accessibility", "Animation", "Composition", "Common Mistakes", "Code Example", "Docs URL"]
     },
     "animation": {
         "file": "components/shadcn-animations.csv",
         "search_cols": ["Animation", "Type", "Use Cases", "Tailwind Class"],
+        "analyzer": "code",
+        "facet_cols": ["Type", "Duration", "Easing"],
         "output_cols": ["Animation", "Type", "Tailwind Class", "Framer Motion", "Duration", "Easing", "Use Cases", "Performance", "Reduced Motion"]
     },
     "effect": {
         "file": "components/shadcn-effects.csv",
         "search_cols": ["Effect", "Category", "Trigger", "Implementation"],
+        "analyzer": "code",
+        "facet_cols": ["Duration"],
         "output_cols": ["Effect", "Category", "Implementation", "Trigger", "Duration", "Props", "Example", "Notes"]
     },
     "pattern": {
@@ -84,6 +166,7 @@ CSV_CONFIG = {
     "platform": {
         "file": "cross-platform/platforms/web.csv",
         "search_cols": ["Category", "Guideline", "Description"],
+        "facet_cols": ["Category"],
         "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Platform Notes"]
     }
 }
@@ -119,6 +202,15 @@ PLATFORM_FILES = {
     "flutter": "cross-platform/platforms/flutter.csv"
 }
 
+# Pattern columns describing each platform's implementation
+PATTERN_PLATFORM_COLS = {
+    "web": "Web",
+    "electron": "Electron",
+    "swiftui": "SwiftUI",
+    "react-native": "React Native",
+    "flutter": "Flutter"
+}
+
 # Token files for design tokens
 TOKEN_FILES = {
     "spacing": "cross-platform/tokens/spacing.json",
@@ -127,38 +219,425 @@ TOKEN_FILES = {
     "motion": "cross-platform/tokens/motion.json"
 }
 
+# Keywords used to auto-detect the search domain
+DOMAIN_KEYWORDS = {
+    "color": ["color", "palette", "hex", "#", "rgb"],
+    "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
+    "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
+    "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
+    "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
+    "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
+    "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "keyboard", "mobile"],
+    "typography": ["font", "typography", "heading", "serif", "sans"],
+    "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
+    "component": ["component", "button", "dialog", "modal", "input", "select", "accordion", "tabs", "card", "form", "table", "dropdown", "popover", "tooltip", "sheet", "drawer", "avatar", "badge"],
+    "animation": ["animation", "animate", "transition", "fade", "slide", "zoom", "spin", "pulse", "bounce", "framer", "motion"],
+    "effect": ["effect", "hover", "focus", "active", "loading", "skeleton", "shimmer", "ripple", "glow"],
+    "pattern": ["pattern", "sidebar", "command palette", "navigation", "feedback", "empty state", "loading state", "master detail", "kanban", "timeline"]
+}
+
 # Common columns for all stacks
 _STACK_COLS = {
     "search_cols": ["Category", "Guideline", "Description", "Do", "Don't"],
+    "facet_cols": ["Category", "Severity"],
     "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Code Good", "Code Bad", "Severity", "Docs URL"]
 }
 
 AVAILABLE_STACKS = list(STACK_CONFIG.keys())
 
+# Common columns for all platform guideline files
+_PLATFORM_COLS = {
+    "search_cols": ["Category", "Guideline", "Description"],
+    "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Platform Notes"]
+}
+
+
+# ============ SHARED DATA STORE ============
+def _iter_data_files(root):
+    """Yield data files under root as sorted relative POSIX paths, skipping hidden entries"""
+    if isinstance(root, _BundlePath):
+        yield from root.members()
+        return
+    for path in sorted(root.rglob("*")):
+        rel = path.relative_to(root)
+        if path.is_file() and not any(part.startswith(".") for part in rel.parts):
+            yield rel.as_posix()
+
+
+def _stat_fingerprint(root):
+    """Cheap change detector for a data tree (path, size, mtime)"""
+    h = hashlib.sha1()
+    for rel in _iter_data_files(root):
+        stat = (root / rel).stat()
+        h.update(f"{rel}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    return h.hexdigest()
+
+
+def _content_manifest(root):
+    """Map each data file to the SHA-256 of its content"""
+    manifest = {}
+    for rel in _iter_data_files(root):
+        manifest[rel] = hashlib.sha256((root / rel).read_bytes()).hexdigest()
+    return manifest
+
+
+def _materialize_tree(store, local, manifest, tree_dir):
+    """Store blobs by content hash and link them into tree_dir under their data paths"""
+    tmp = tree_dir.with_name(f".{tree_dir.name}.{os.getpid()}.tmp")
+    for rel, digest in manifest.items():
+        blob = store / "objects" / digest[:2] / digest
+        if not blob.exists():
+            blob.parent.mkdir(parents=True, exist_ok=True)
+            partial = blob.with_name(f"{digest}.{os.getpid()}.tmp")
+            shutil.copyfile(local / rel, partial)
+            os.replace(partial, blob)
+        target = tmp / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(blob, target)
+        except OSError:
+            shutil.copyfile(blob, target)
+    try:
+        os.rename(tmp, tree_dir)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # Another installation published the same tree first
+
+
+def _resolve_data_dir(local):
+    """Return (data_dir, index_dir), switching to the shared store when SHARED_STORE is set.
+
+    Installs with byte-identical data resolve to the same tree, so they share
+    one set of built indexes and caches. A per-install stat fingerprint avoids
+    re-hashing file contents on every start.
+    """
+    local_key = hashlib.sha1(str(local.resolve()).encode()).hexdigest()[:16]
+    local_index = CACHE_DIR / "indexes" / f"local-{local_key}"
+    if not SHARED_STORE or not local.is_dir():
+        return local, local_index
+
+    store = CACHE_DIR / "store"
+    try:
+        stamp = _stat_fingerprint(local)
+        marker = store / "installs" / f"{local_key}.json"
+        try:
+            with open(marker, 'r', encoding='utf-8') as f:
+                info = json.load(f)
+            if info["stamp"] == stamp and (store / "trees" / info["tree"]).is_dir():
+                return store / "trees" / info["tree"], store / "indexes" / info["tree"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        manifest = _content_manifest(local)
+        tree = hashlib.sha256("".join(f"{rel}:{d}\n" for rel, d in manifest.items()).encode()).hexdigest()[:24]
+        tree_dir = store / "trees" / tree
+        if not tree_dir.is_dir():
+            tree_dir.parent.mkdir(parents=True, exist_ok=True)
+            _materialize_tree(store, local, manifest, tree_dir)
+
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        with open(marker, 'w', encoding='utf-8') as f:
+            json.dump({"stamp": stamp, "tree": tree, "source": str(local)}, f)
+        return tree_dir, store / "indexes" / tree
+    except OSError:
+        return local, local_index
+
+
+# ============ ZIPAPP BUNDLE / DATA PACK ============
+BUNDLE_DATA = "data"
+BUNDLE_INDEX = "index"
+
+
+def _bm25_key(file, search_cols):
+    """Archive member name of the prebuilt BM25 index for one table"""
+    return hashlib.sha1(json.dumps([file, list(search_cols)]).encode()).hexdigest()[:16]
+
+
+class _Bundle:
+    """Data tree and prebuilt indexes packed into a zip archive (a .pyz bundle or a data pack).
+
+    Every data file and index segment is its own compressed member, and the
+    zip directory is the table of contents: the archive stays open and only
+    the members a query touches are decompressed, never extracted.
+    """
+
+    def __init__(self, archive):
+        self.archive = archive
+        self.zip = zipfile.ZipFile(archive)
+        with self.zip.open(f"{BUNDLE_INDEX}/manifest.json") as f:
+            manifest = json.load(f)
+        self.version = manifest["version"]
+        self.sizes = manifest["files"]
+        self.dirs = {rel.rsplit("/", 1)[0] for rel in self.sizes if "/" in rel} | {""}
+
+    def read(self, rel):
+        return self.zip.read(f"{BUNDLE_DATA}/{rel}")
+
+    def load(self, name):
+        """Unpickled prebuilt index member, or None when the bundle has none"""
+        try:
+            return pickle.loads(self.zip.read(f"{BUNDLE_INDEX}/{name}.pickle"))
+        except KeyError:
+            return None
+
+
+class _BundlePath:
+    """Read-only stand-in for a Path into the bundled data tree (the subset of Path the kit uses)"""
+
+    def __init__(self, bundle, rel=""):
+        self.bundle = bundle
+        self.rel = rel
+
+    def __truediv__(self, other):
+        return _BundlePath(self.bundle, f"{self.rel}/{other}" if self.rel else str(other))
+
+    def __str__(self):
+        return f"{self.bundle.archive}/{BUNDLE_DATA}/{self.rel}".rstrip("/")
+
+    def is_file(self):
+        return self.rel in self.bundle.sizes
+
+    def is_dir(self):
+        return self.rel in self.bundle.dirs
+
+    def exists(self):
+        return self.is_file() or self.is_dir()
+
+    def members(self):
+        """Packed data files under this directory as sorted relative POSIX paths"""
+        prefix = f"{self.rel}/" if self.rel else ""
+        return [rel[len(prefix):] for rel in sorted(self.bundle.sizes) if rel.startswith(prefix)]
+
+    def stat(self):
+        """Size from the manifest; bundled data never changes, so mtime is fixed"""
+        if not self.is_file():
+            raise FileNotFoundError(str(self))
+        return SimpleNamespace(st_size=self.bundle.sizes[self.rel], st_mtime=0.0, st_mtime_ns=0)
+
+    def open(self, mode='r', encoding=None, newline=None):
+        if not self.is_file():
+            raise FileNotFoundError(str(self))
+        data = io.BytesIO(self.bundle.read(self.rel))
+        return data if "b" in mode else io.TextIOWrapper(data, encoding=encoding or "utf-8", newline=newline)
+
+    def read_bytes(self):
+        if not self.is_file():
+            raise FileNotFoundError(str(self))
+        return self.bundle.read(self.rel)
+
+
+def _open_data(path):
+    """Return (data_dir, index_dir) for a data directory or a packed archive"""
+    if path.is_file():
+        bundle = _Bundle(path)
+        return _BundlePath(bundle), CACHE_DIR / "indexes" / f"bundle-{bundle.version}"
+    return _resolve_data_dir(path)
+
+
+def _default_data():
+    """The .pyz core was imported from, else the data directory, else the data pack beside it"""
+    loader = globals().get("__loader__")
+    if isinstance(loader, zipimport.zipimporter):
+        try:
+            return _open_data(Path(loader.archive))
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            pass
+    if not LOCAL_DATA_DIR.is_dir() and LOCAL_DATA_PACK.is_file():
+        return _open_data(LOCAL_DATA_PACK)
+    return _resolve_data_dir(LOCAL_DATA_DIR)
+
+
+DATA_DIR, INDEX_DIR = _default_data()
+
+
+# ============ ANALYZERS ============
+_WORD_RE = re.compile(r'\w+')
+_IDENTIFIER_RE = re.compile(r'[^\W_]+(?:[-_][^\W_]+)*')
+_IDENTIFIER_PART_RE = re.compile(r'[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[^\W\d_]+|\d+')
+
+
+def _fold(text):
+    """NFKD-decompose and drop combining marks (café -> cafe, ﬁ -> fi)"""
+    if text.isascii():
+        return text
+    return "".join(c for c in unicodedata.normalize("NFKD", text) if not unicodedata.combining(c))
+
+
+def _fold_map(text):
+    """_fold plus, per folded character, the index of the original character it came from"""
+    chars, origin = [], []
+    for i, c in enumerate(text):
+        for folded in _fold(c):
+            chars.append(folded)
+            origin.append(i)
+    return "".join(chars), origin
+
+
+class Analyzer:
+    """Text -> index terms, with the steps chosen once at construction.
+
+    The same instance tokenizes documents and queries, so both sides always
+    agree. `key` fingerprints the configuration for cached indexes.
+    """
+
+    def __init__(self, min_length=3, short_terms=(), fold=True, split_identifiers=False):
+        self.min_length = min_length
+        self.short_terms = frozenset(t.lower() for t in short_terms)
+        self.fold = fold
+        self.split_identifiers = split_identifiers
+        self.key = hashlib.sha1(json.dumps(
+            [min_length, sorted(self.short_terms), fold, split_identifiers]).encode()).hexdigest()[:12]
+        self._run = self._identifiers if split_identifiers else self._words
+        self._run_spans = self._identifier_spans if split_identifiers else self._word_spans
+        self._run_positions = self._identifier_positions if split_identifiers else self._word_positions
+
+    def __call__(self, text):
+        text = str(text)
+        return self._run(_fold(text) if self.fold else text)
+
+    def spans(self, text):
+        """(term, start, end) for each term __call__ yields, as offsets into the original text"""
+        text = str(text)
+        if not self.fold or text.isascii():
+            return self._run_spans(text)
+        folded, origin = _fold_map(text)
+        return [(term, origin[start], origin[end - 1] + 1) for term, start, end in self._run_spans(folded)]
+
+    def positions(self, text):
+        """Word position of each term __call__ yields, for phrase and NEAR/k matching.
+
+        Split identifier parts take one position each and the whole identifier
+        shares its first part's, so "card hover" matches "Card hover-lift" and
+        "hover lift" matches it too.
+        """
+        text = str(text)
+        return self._run_positions(_fold(text) if self.fold else text)
+
+    def _keep(self, term):
+        return len(term) >= self.min_length or term in self.short_terms
+
+    def _words(self, text):
+        keep = self._keep
+        return [w for w in _WORD_RE.findall(text.lower()) if keep(w)]
+
+    def _word_spans(self, text):
+        keep = self._keep
+        return [(m.group().lower(), m.start(), m.end()) for m in _WORD_RE.finditer(text) if keep(m.group().lower())]
+
+    def _word_positions(self, text):
+        return list(range(len(self._words(text))))
+
+    def _identifiers(self, text):
+        return [term for term, _, _, _ in self._identifier_tokens(text)]
+
+    def _identifier_spans(self, text):
+        return [(term, start, end) for term, start, end, _ in self._identifier_tokens(text)]
+
+    def _identifier_positions(self, text):
+        return [pos for _, _, _, pos in self._identifier_tokens(text)]
+
+    def _identifier_tokens(self, text):
+        """(term, start, end, position): whole identifiers (case-folded) followed by their
+        hyphen/underscore/camelCase parts, the whole at its first part's position"""
+        keep = self._keep
+        tokens, pos = [], 0
+        for ident in _IDENTIFIER_RE.finditer(text):
+            whole, base = ident.group().lower(), ident.start()
+            parts = list(_IDENTIFIER_PART_RE.finditer(ident.group()))
+            parts = [(p.group().lower(), base + p.start(), base + p.end()) for p in parts
+                     if p.group().lower() != whole and keep(p.group().lower())] if len(parts) > 1 else []
+            if keep(whole):
+                tokens.append((whole, base, ident.end(), pos))
+            tokens.extend((term, start, end, pos + i) for i, (term, start, end) in enumerate(parts))
+            pos += len(parts) or keep(whole)
+        return tokens
+
+
+ANALYZER_PIPELINES = {name: Analyzer(**options) for name, options in ANALYZERS.items()}
+
+
+def analyzer_for(file):
+    """Analyzer configured for a data file's domain (DEFAULT_ANALYZER when none is set)"""
+    name = _FILE_ANALYZERS.get(file, DEFAULT_ANALYZER)
+    return ANALYZER_PIPELINES[name]
+
+
+_FILE_ANALYZERS = {config["file"]: config["analyzer"] for config in CSV_CONFIG.values() if "analyzer" in config}
+if "analyzer" in _STACK_COLS:
+    _FILE_ANALYZERS.update({config["file"]: _STACK_COLS["analyzer"] for config in STACK_CONFIG.values()})
+
 
 # ============ BM25 IMPLEMENTATION ============
+_PHRASE_RE = re.compile(r'"([^"]+)"')
+_NEAR_RE = re.compile(r'(\S+)\s+NEAR/(\d+)\s+(\S+)')
+
+
+def _encode_positions(positions):
+    """Delta + varint encode ascending token positions into bytes"""
+    out = bytearray()
+    prev = 0
+    for pos in positions:
+        delta = pos - prev
+        prev = pos
+        while delta >= 0x80:
+            out.append((delta & 0x7F) | 0x80)
+            delta >>= 7
+        out.append(delta)
+    return bytes(out)
+
+
+def _decode_positions(data):
+    """Inverse of _encode_positions"""
+    positions, value, shift, prev = [], 0, 0, 0
+    for byte in data:
+        value |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        prev += value
+        positions.append(prev)
+        value, shift = 0, 0
+    return positions
+
+
+def strip_operators(query):
+    """Query text without phrase quotes and NEAR/k operators"""
+    return re.sub(r'\bNEAR/\d+\b', ' ', query).replace('"', ' ')
+
+
 class BM25:
-    """BM25 ranking algorithm for text search"""
+    """BM25 ranking algorithm for text search.
+
+    Each term's postings hold the final per-document BM25 contribution
+    (impact), sorted highest first, so a query is pure accumulation and top-k
+    queries can stop early. Changing k1/b means calling reweight(), not a
+    per-query cost.
+    """
 
-    def __init__(self, k1=1.5, b=0.75):
+    def __init__(self, k1=BM25_K1, b=BM25_B, analyzer=None):
         self.k1 = k1
         self.b = b
+        self.analyzer = analyzer or ANALYZER_PIPELINES[DEFAULT_ANALYZER]
         self.corpus = []
         self.doc_lengths = []
         self.avgdl = 0
         self.idf = {}
         self.doc_freqs = defaultdict(int)
         self.N = 0
+        self.postings = None
+        self.term_freqs = []
+        self.impacts = {}
+        self.forward = []
 
     def tokenize(self, text):
-        """Lowercase, split, remove punctuation, filter short words"""
-        text = re.sub(r'[^\w\s]', ' ', str(text).lower())
-        return [w for w in text.split() if len(w) > 2]
+        """Index terms of text under this index's analyzer"""
+        return self.analyzer(text)
 
-    def fit(self, documents):
-        """Build BM25 index from documents"""
+    def fit(self, documents, positions=False):
+        """Build BM25 index from documents; `positions` also keeps a positional index for phrase/NEAR queries"""
         self.corpus = [self.tokenize(doc) for doc in documents]
         self.N = len(self.corpus)
+        if positions:
+            self._index_positions(documents)
         if self.N == 0:
             return
         self.doc_lengths = [len(doc) for doc in self.corpus]
@@ -174,241 +653,1478 @@ class BM25:
         for word, freq in self.doc_freqs.items():
             self.idf[word] = log((self.N - freq + 0.5) / (freq + 0.5) + 1)
 
-    def score(self, query):
-        """Score all documents against query"""
-        query_tokens = self.tokenize(query)
-        scores = []
-
-        for idx, doc in enumerate(self.corpus):
-            score = 0
-            doc_len = self.doc_lengths[idx]
-            term_freqs = defaultdict(int)
+        self.term_freqs = []
+        for doc in self.corpus:
+            freqs = defaultdict(int)
             for word in doc:
-                term_freqs[word] += 1
+                freqs[word] += 1
+            self.term_freqs.append(dict(freqs))
+        self._index_impacts()
 
-            for token in query_tokens:
-                if token in self.idf:
-                    tf = term_freqs[token]
-                    idf = self.idf[token]
-                    numerator = tf * (self.k1 + 1)
-                    denominator = tf + self.k1 * (1 - self.b + self.b * doc_len / self.avgdl)
-                    score += idf * numerator / denominator
+    def _index_impacts(self):
+        """Impact-ordered postings {term: [(impact, doc)]} plus per-document {term: impact}"""
+        impacts = defaultdict(list)
+        forward = []
+        for idx, freqs in enumerate(self.term_freqs):
+            if not freqs:
+                forward.append({})
+                continue
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[idx] / self.avgdl)
+            weights = {}
+            for word, tf in freqs.items():
+                weights[word] = self.idf[word] * (tf * (self.k1 + 1)) / (tf + norm)
+                impacts[word].append((weights[word], idx))
+            forward.append(weights)
+        self.forward = forward
+        self.impacts = {word: sorted(plist, key=lambda p: (-p[0], p[1])) for word, plist in impacts.items()}
+
+    def reweight(self, k1=None, b=None):
+        """Re-index impacts for new k1/b without re-tokenizing the corpus"""
+        self.k1 = self.k1 if k1 is None else k1
+        self.b = self.b if b is None else b
+        if self.N:
+            self._index_impacts()
+
+    def _index_positions(self, documents):
+        """Postings {term: {doc: encoded positions}} for the documents the index was fitted on"""
+        positions = defaultdict(lambda: defaultdict(list))
+        for idx, (doc, text) in enumerate(zip(self.corpus, documents)):
+            for word, pos in zip(doc, self.analyzer.positions(text)):
+                positions[word][idx].append(pos)
+        self.postings = {word: {idx: _encode_positions(p) for idx, p in docs.items()}
+                         for word, docs in positions.items()}
+
+    def _positions(self, term, idx):
+        return _decode_positions(self.postings.get(term, {}).get(idx, b""))
+
+    def _phrase_docs(self, tokens, offsets):
+        """Documents containing tokens at the same relative positions as in the phrase (`offsets`)"""
+        docs = set(self.postings.get(tokens[0], {}))
+        for token in tokens[1:]:
+            docs &= set(self.postings.get(token, {}))
+        matched = set()
+        for idx in docs:
+            later = [(set(self._positions(token, idx)), offset - offsets[0])
+                     for token, offset in zip(tokens[1:], offsets[1:])]
+            if any(all(pos + shift in found for found, shift in later) for pos in self._positions(tokens[0], idx)):
+                matched.add(idx)
+        return matched
+
+    def _near_docs(self, left, right, distance):
+        """Documents where the two terms occur within `distance` positions of each other"""
+        matched = set()
+        for idx in set(self.postings.get(left, {})) & set(self.postings.get(right, {})):
+            a, b = self._positions(left, idx), self._positions(right, idx)
+            i = j = 0
+            while i < len(a) and j < len(b):  # Merge the two sorted lists
+                if abs(a[i] - b[j]) <= distance:
+                    matched.add(idx)
+                    break
+                if a[i] < b[j]:
+                    i += 1
+                else:
+                    j += 1
+        return matched
+
+    def constrain(self, query, candidates=None):
+        """Restrict candidates to documents satisfying every "quoted phrase" and `a NEAR/k b` in query.
+
+        Returns candidates unchanged when the query has no such clause or the
+        index was fitted without positions.
+        """
+        if self.postings is None:
+            return candidates
+        allowed = None
+        clauses = [("phrase", self.tokenize(p), self.analyzer.positions(p)) for p in _PHRASE_RE.findall(query)]
+        clauses += [("near", self.tokenize(a) + self.tokenize(b), int(k)) for a, k, b in _NEAR_RE.findall(query)]
+        for clause in clauses:
+            tokens = clause[1]
+            if clause[0] == "phrase" and tokens:
+                docs = self._phrase_docs(tokens, clause[2])
+            elif clause[0] == "near" and len(tokens) == 2:
+                docs = self._near_docs(tokens[0], tokens[1], clause[2])
+            else:
+                continue  # Clause reduced to nothing by tokenization
+            allowed = docs if allowed is None else allowed & docs
+        if allowed is None:
+            return candidates
+        return [idx for idx in (range(self.N) if candidates is None else candidates) if idx in allowed]
+
+    def score(self, query, candidates=None, top=None):
+        """Score all documents (or only the candidate indexes) against query.
+
+        With `top`, only the best `top` documents with a positive score are
+        returned and postings are walked in impact order until no unseen
+        document can still make the cut.
+        """
+        candidates = self.constrain(query, candidates)
+        query_tokens = self.tokenize(strip_operators(query))
+        allowed = None if candidates is None else set(candidates)
+        if top:
+            return self._top_impacts(query_tokens, allowed, top)
+
+        acc = defaultdict(float)
+        for token in query_tokens:
+            for impact, idx in self.impacts.get(token, ()):
+                if allowed is None or idx in allowed:
+                    acc[idx] += impact
+        scores = [(idx, acc.get(idx, 0)) for idx in (range(self.N) if candidates is None else candidates)]
+        return sorted(scores, key=lambda x: x[1], reverse=True)
 
+    def explain(self, query, idx):
+        """Per query term tf, idf and contribution to document idx, read from the impact index"""
+        counts = {}
+        for token in self.tokenize(strip_operators(query)):
+            counts[token] = counts.get(token, 0) + 1
+        weights = self.forward[idx]
+        return [{"term": term,
+                 "tf": self.term_freqs[idx].get(term, 0),
+                 "idf": round(self.idf.get(term, 0.0), 4),
+                 "contribution": round(weights.get(term, 0.0) * n, 4)}
+                for term, n in counts.items()]
+
+    def _top_impacts(self, query_tokens, allowed, top):
+        """Score-at-a-time evaluation with early stopping; exact for the returned documents"""
+        counts = defaultdict(int)
+        for token in query_tokens:
+            counts[token] += 1
+        lists = [(self.impacts[t], n) for t, n in counts.items() if t in self.impacts]
+        heads = [0] * len(lists)
+        heap = [(-plist[0][0] * n, i) for i, (plist, n) in enumerate(lists)]
+        heapq.heapify(heap)
+
+        partial = defaultdict(float)
+        steps = 0
+        while heap:
+            _, i = heapq.heappop(heap)
+            plist, n = lists[i]
+            impact, idx = plist[heads[i]]
+            heads[i] += 1
+            if heads[i] < len(plist):
+                heapq.heappush(heap, (-plist[heads[i]][0] * n, i))
+            if allowed is None or idx in allowed:
+                partial[idx] += impact * n
+
+            steps += 1
+            if steps % IMPACT_CHECK_EVERY == 0 and len(partial) >= top:
+                # An unseen document scores at most the sum of the remaining list heads
+                bound = sum(lists[j][0][heads[j]][0] * lists[j][1] for j in range(len(lists)) if heads[j] < len(lists[j][0]))
+                if bound < heapq.nlargest(top, partial.values())[-1]:
+                    break
+
+        scores = []
+        for idx in partial:
+            weights = self.forward[idx]
+            score = 0
+            for token in query_tokens:
+                score += weights.get(token, 0.0)
             scores.append((idx, score))
+        scores.sort(key=lambda x: (-x[1], x[0]))
+        return [(idx, score) for idx, score in scores[:top] if score > 0]
+
+
+# ============ LSA IMPLEMENTATION ============
+def _dot(a, b):
+    return sum(map(operator.mul, a, b))
+
+
+def _normalize(vec):
+    norm = sqrt(_dot(vec, vec))
+    return [v / norm for v in vec] if norm else vec
+
+
+def _jacobi_eigen(matrix):
+    """Eigen-decompose a small symmetric matrix; returns (eigenvalues, eigenvectors as rows)"""
+    n = len(matrix)
+    a = [row[:] for row in matrix]
+    v = [[float(i == j) for j in range(n)] for i in range(n)]
+    scale = sum(a[i][i] ** 2 for i in range(n)) or 1.0
+    for _ in range(60):
+        off = sum(a[i][j] ** 2 for i in range(n) for j in range(i + 1, n))
+        if off < 1e-18 * scale:
+            break
+        for p in range(n):
+            for q in range(p + 1, n):
+                apq = a[p][q]
+                if abs(apq) < 1e-15:
+                    continue
+                theta = (a[q][q] - a[p][p]) / (2 * apq)
+                t = (1 if theta >= 0 else -1) / (abs(theta) + sqrt(theta * theta + 1))
+                c = 1 / sqrt(t * t + 1)
+                s = t * c
+                # Rotate rows p and q whole, then mirror them into the columns to stay symmetric
+                rp, rq = a[p], a[q]
+                new_p = [c * x - s * y for x, y in zip(rp, rq)]
+                new_q = [s * x + c * y for x, y in zip(rp, rq)]
+                new_p[p], new_q[q] = rp[p] - t * apq, rq[q] + t * apq
+                new_p[q] = new_q[p] = 0.0
+                a[p], a[q] = new_p, new_q
+                for row, x, y in zip(a, new_p, new_q):
+                    row[p], row[q] = x, y
+                vp, vq = v[p], v[q]
+                v[p] = [c * x - s * y for x, y in zip(vp, vq)]
+                v[q] = [s * x + c * y for x, y in zip(vp, vq)]
+    return [a[i][i] for i in range(n)], v
+
+
+def _orthonormalize(cols):
+    """Modified Gram-Schmidt over a list of column vectors"""
+    basis = []
+    for col in cols:
+        for prev in basis:
+            proj = _dot(col, prev)
+            col = [c - proj * p for c, p in zip(col, prev)]
+        basis.append(_normalize(col))
+    return basis
+
+
+def _sparse_dot(rows, dense, width):
+    """Sparse rows ({term: weight}) times a dense term-major matrix; returns row-major results"""
+    out = []
+    for row in rows:
+        acc = [0.0] * width
+        for t, w in row.items():
+            acc = [a + w * x for a, x in zip(acc, dense[t])]
+        out.append(acc)
+    return out
+
 
+def _sparse_tdot(rows, dense, n_terms, width):
+    """Transposed sparse rows times a dense row-major matrix; returns term-major results"""
+    out = [[0.0] * width for _ in range(n_terms)]
+    for row, vec in zip(rows, dense):
+        for t, w in row.items():
+            out[t] = [a + w * x for a, x in zip(out[t], vec)]
+    return out
+
+
+def _sparse_svd(rows, n_terms, k):
+    """Top-k (sigma^2, left singular vector) pairs of a sparse matrix by randomized range finding.
+
+    Works on an N x (k + oversample) sketch, so cost grows with the non-zeros
+    rather than with N^2; only the small projected matrix is eigen-decomposed.
+    """
+    width = min(k + LSA_OVERSAMPLE, len(rows), n_terms)
+    rng = random.Random(0)
+    omega = [[rng.gauss(0, 1) for _ in range(width)] for _ in range(n_terms)]
+    sketch = _sparse_dot(rows, omega, width)
+    for _ in range(LSA_POWER_ITERATIONS):
+        basis = list(zip(*_orthonormalize(zip(*sketch))))
+        sketch = _sparse_dot(rows, _sparse_tdot(rows, basis, n_terms, width), width)
+    basis = _orthonormalize(zip(*sketch))
+    # B = Q^T A; eigenpairs of B B^T give sigma^2 and U = Q W
+    projected = list(zip(*_sparse_tdot(rows, list(zip(*basis)), n_terms, width)))
+    small = [[_dot(projected[i], projected[j]) for j in range(width)] for i in range(width)]
+    values, vectors = _jacobi_eigen(small)
+    order = sorted(range(width), key=lambda i: -values[i])[:k]
+    pairs = []
+    for i in order:
+        if values[i] <= 1e-9:
+            break
+        u = [0.0] * len(rows)
+        for weight, col in zip(vectors[i], basis):
+            u = [a + weight * x for a, x in zip(u, col)]
+        pairs.append((values[i], u))
+    return pairs
+
+
+class LSA:
+    """Latent semantic ranker: TF-IDF rows reduced by truncated SVD, scored by cosine similarity.
+
+    Vectors live in one float32 buffer (documents first, then terms) so a
+    fitted index can be saved to INDEX_DIR and mapped back without parsing.
+    """
+
+    def __init__(self, dims=LSA_DIMENSIONS, analyzer=None):
+        self.dims = dims
+        self.tokenize = analyzer or ANALYZER_PIPELINES[DEFAULT_ANALYZER]
+        self.vocab = {}
+        self.idf = []
+        self.N = 0
+        self.k = 0
+        self.vectors = array("f")
+
+    def _weights(self, tokens):
+        """Sublinear TF-IDF weights as a normalized sparse {term index: weight}"""
+        counts = defaultdict(int)
+        for token in tokens:
+            if token in self.vocab:
+                counts[self.vocab[token]] += 1
+        weights = {t: (1 + log(c)) * self.idf[t] for t, c in counts.items()}
+        norm = sqrt(sum(w * w for w in weights.values()))
+        return {t: w / norm for t, w in weights.items()} if norm else {}
+
+    def fit(self, documents):
+        """Build the reduced document and term vectors"""
+        corpus = [self.tokenize(doc) for doc in documents]
+        self.N = len(corpus)
+        doc_freqs = defaultdict(int)
+        for doc in corpus:
+            for word in set(doc):
+                doc_freqs[word] += 1
+        self.vocab = {word: i for i, word in enumerate(sorted(doc_freqs))}
+        self.idf = [log((1 + self.N) / (1 + doc_freqs[word])) + 1 for word in sorted(doc_freqs)]
+        rows = [self._weights(doc) for doc in corpus]
+
+        k = min(self.dims, max(self.N - 1, 1), len(self.vocab))
+        pairs = _sparse_svd(rows, len(self.vocab), k) if self.N else []
+        self.k = len(pairs)
+        sigmas = [sqrt(value) for value, _ in pairs]
+
+        # Documents: U * sigma, normalized for cosine scoring
+        vectors = array("f")
+        for i in range(self.N):
+            vectors.extend(_normalize([sigma * u[i] for sigma, (_, u) in zip(sigmas, pairs)]))
+        # Terms: A^T U / sigma, used to fold queries into the latent space
+        terms = [[0.0] * self.k for _ in self.vocab]
+        for i, row in enumerate(rows):
+            for t, w in row.items():
+                vec = terms[t]
+                for c, (sigma, (_, u)) in enumerate(zip(sigmas, pairs)):
+                    vec[c] += w * u[i] / sigma
+        for vec in terms:
+            vectors.extend(vec)
+        self.vectors = vectors
+
+    def score(self, query, candidates=None, top=None):
+        """Cosine similarity of the folded-in query against documents, best first"""
+        weights = self._weights(self.tokenize(strip_operators(query)))
+        if not weights or not self.k:
+            return []
+        k, base = self.k, self.N * self.k
+        qvec = [0.0] * k
+        for t, w in weights.items():
+            offset = base + t * k
+            for c in range(k):
+                qvec[c] += w * self.vectors[offset + c]
+        qvec = _normalize(qvec)
+
+        vectors = self.vectors
+        scores = ((idx, _dot(qvec, vectors[idx * k:(idx + 1) * k]))
+                  for idx in (range(self.N) if candidates is None else candidates))
+        if top is not None:
+            return heapq.nlargest(top, scores, key=lambda x: x[1])
         return sorted(scores, key=lambda x: x[1], reverse=True)
 
+    def save(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_suffix(".json"), 'w', encoding='utf-8') as f:
+            json.dump({"vocab": list(self.vocab), "idf": self.idf, "N": self.N, "k": self.k}, f, ensure_ascii=False)
+        with open(path.with_suffix(".f32"), 'wb') as f:
+            self.vectors.tofile(f)
+
+    @classmethod
+    def load(cls, path, analyzer=None):
+        """Map a saved index back in; the float32 vectors stay memory-mapped"""
+        with open(path.with_suffix(".json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        lsa = cls(analyzer=analyzer)
+        lsa.vocab = {word: i for i, word in enumerate(meta["vocab"])}
+        lsa.idf, lsa.N, lsa.k = meta["idf"], meta["N"], meta["k"]
+        size = (lsa.N + len(lsa.vocab)) * lsa.k
+        if size:
+            with open(path.with_suffix(".f32"), 'rb') as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            lsa.vectors = memoryview(buffer).cast("f")
+            if len(lsa.vectors) != size:
+                raise ValueError("LSA vector file is truncated")
+        return lsa
+
 
 # ============ SEARCH FUNCTIONS ============
 def _load_csv(filepath):
-    """Load CSV and return list of dicts"""
-    with open(filepath, 'r', encoding='utf-8') as f:
+    """Load CSV and return list of dicts (pre-parsed rows when the file is bundled)"""
+    if isinstance(filepath, _BundlePath):
+        rows = filepath.bundle.load(f"rows/{filepath.rel}")
+        if rows is not None:
+            return rows
+    with filepath.open('r', encoding='utf-8') as f:
         return list(csv.DictReader(f))
 
 
-def _search_csv(filepath, search_cols, output_cols, query, max_results):
-    """Core search function using BM25"""
-    if not filepath.exists():
-        return []
+def _norm_value(value):
+    """Normalize a categorical cell for matching: drop status glyphs, casefold"""
+    return re.sub(r'[^\w\s/+&().,-]', '', str(value or "")).strip().casefold()
+
 
-    data = _load_csv(filepath)
+def _column_bitmaps(data, col):
+    """Build {normalized value: bitmap} for one column, bit i set when row i holds the value,
+    and {normalized value: first raw spelling} to label each value"""
+    rows_by_value = defaultdict(list)
+    labels = {}
+    for idx, row in enumerate(data):
+        value = _norm_value(row.get(col, ""))
+        rows_by_value[value].append(idx)
+        labels.setdefault(value, row.get(col, ""))
 
-    # Build documents from search columns
-    documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in data]
+    bitmaps = {}
+    for value, rows in rows_by_value.items():
+        bits = bytearray((len(data) + 7) // 8)
+        for idx in rows:
+            bits[idx >> 3] |= 1 << (idx & 7)
+        bitmaps[value] = int.from_bytes(bits, "little")
+    return bitmaps, labels
 
-    # BM25 search
-    bm25 = BM25()
-    bm25.fit(documents)
-    ranked = bm25.score(query)
 
-    # Get top results with score > 0
-    results = []
-    for idx, score in ranked[:max_results]:
-        if score > 0:
-            row = data[idx]
-            results.append({col: row.get(col, "") for col in output_cols if col in row})
+def _bitmap_rows(bitmap):
+    """Expand a bitmap into ascending row indexes"""
+    return [idx for idx, bit in enumerate(bin(bitmap)[:1:-1]) if bit == "1"]
 
-    return results
+
+def _select_cols(output_cols, fields=None):
+    """Project output columns onto requested fields (case-insensitive, keeps config order).
+
+    Raises ValueError for a field that is not an output column.
+    """
+    if not fields:
+        return output_cols
+    wanted = {f.strip().lower() for f in fields if f.strip()}
+    unknown = wanted - {col.lower() for col in output_cols}
+    if unknown:
+        names = [f.strip() for f in fields if f.strip().lower() in unknown]
+        raise ValueError(f"Unknown field: {', '.join(names)}. Available: {', '.join(output_cols)}")
+    return [col for col in output_cols if col.lower() in wanted]
+
+
+def _check_fields(sources, fields):
+    """Raise ValueError for unknown fields up front, before rows are materialized (or streamed)"""
+    for source in sources:
+        if "output_cols" in source:
+            _select_cols(source["output_cols"], fields)
+
+
+def _flatten_json(obj, prefix=""):
+    """Flatten nested JSON to searchable strings"""
+    items = []
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            new_key = f"{prefix}.{k}" if prefix else k
+            if isinstance(v, dict):
+                items.extend(_flatten_json(v, new_key))
+            else:
+                items.append({"key": new_key, "value": str(v)})
+    return items
+
+
+class _KeywordAutomaton:
+    """Aho-Corasick automaton matching every domain keyword in one pass over the query"""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for domain, words in keywords.items():
+            for word in words:
+                node = 0
+                for ch in word:
+                    if ch not in self.goto[node]:
+                        self.goto.append({})
+                        self.fail.append(0)
+                        self.out.append([])
+                        self.goto[node][ch] = len(self.goto) - 1
+                    node = self.goto[node][ch]
+                self.out[node].append((word, domain))
+
+        # Breadth-first failure links; outputs inherit from their failure state
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                state = self.fail[node]
+                while state and ch not in self.goto[state]:
+                    state = self.fail[state]
+                self.fail[child] = self.goto[state].get(ch, 0)
+                self.out[child] = self.out[child] + self.out[self.fail[child]]
+
+    @staticmethod
+    def _bounded(text, start, end, word):
+        """Keyword must not sit inside a larger word (a trailing plural s/es is allowed)"""
+        if word[0].isalnum() and start > 0 and text[start - 1].isalnum():
+            return False
+        if not word[-1].isalnum():
+            return True
+        for suffix in ("", "s", "es"):
+            if text.startswith(suffix, end):
+                stop = end + len(suffix)
+                if stop == len(text) or not text[stop].isalnum():
+                    return True
+        return False
+
+    def count(self, text):
+        """Return {domain: hits} for keyword occurrences in text; phrases shadow the words inside them"""
+        matches = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for word, domain in self.out[node]:
+                start = i + 1 - len(word)
+                if self._bounded(text, start, i + 1, word):
+                    matches.append((start, i + 1, domain))
+
+        hits = defaultdict(int)
+        for start, end, domain in matches:
+            if not any(s <= start and end <= e and e - s > end - start for s, e, _ in matches):
+                hits[domain] += 1
+        return hits
+
+
+_DOMAIN_AUTOMATON = None
+
+
+def rank_domains(query):
+    """Rank candidate domains for a query as [(domain, confidence)], best first"""
+    global _DOMAIN_AUTOMATON
+    if _DOMAIN_AUTOMATON is None:
+        _DOMAIN_AUTOMATON = _KeywordAutomaton(DOMAIN_KEYWORDS)
+
+    hits = _DOMAIN_AUTOMATON.count(query.lower())
+    total = sum(hits.values())
+    order = list(DOMAIN_KEYWORDS)
+    ranked = sorted(hits.items(), key=lambda item: (-item[1], order.index(item[0])))
+    return [(domain, round(count / total, 3)) for domain, count in ranked]
 
 
 def detect_domain(query):
     """Auto-detect the most relevant domain from query"""
-    query_lower = query.lower()
-
-    domain_keywords = {
-        "color": ["color", "palette", "hex", "#", "rgb"],
-        "chart": ["chart", "graph", "visualization", "trend", "bar", "pie", "scatter", "heatmap", "funnel"],
-        "landing": ["landing", "page", "cta", "conversion", "hero", "testimonial", "pricing", "section"],
-        "product": ["saas", "ecommerce", "e-commerce", "fintech", "healthcare", "gaming", "portfolio", "crypto", "dashboard"],
-        "prompt": ["prompt", "css", "implementation", "variable", "checklist", "tailwind"],
-        "style": ["style", "design", "ui", "minimalism", "glassmorphism", "neumorphism", "brutalism", "dark mode", "flat", "aurora"],
-        "ux": ["ux", "usability", "accessibility", "wcag", "touch", "scroll", "keyboard", "mobile"],
-        "typography": ["font", "typography", "heading", "serif", "sans"],
-        "icons": ["icon", "icons", "lucide", "heroicons", "symbol", "glyph", "pictogram", "svg icon"],
-        "component": ["component", "button", "dialog", "modal", "input", "select", "accordion", "tabs", "card", "form", "table", "dropdown", "popover", "tooltip", "sheet", "drawer", "avatar", "badge"],
-        "animation": ["animation", "animate", "transition", "fade", "slide", "zoom", "spin", "pulse", "bounce", "framer", "motion"],
-        "effect": ["effect", "hover", "focus", "active", "loading", "skeleton", "shimmer", "ripple", "glow"],
-        "pattern": ["pattern", "sidebar", "command palette", "navigation", "feedback", "empty state", "loading state", "master detail", "kanban", "timeline"]
-    }
+    ranked = rank_domains(query)
+    return ranked[0][0] if ranked else "style"
 
-    scores = {domain: sum(1 for kw in keywords if kw in query_lower) for domain, keywords in domain_keywords.items()}
-    best = max(scores, key=scores.get)
-    return best if scores[best] > 0 else "style"
 
+# ============ CURSOR PAGINATION ============
+def _data_version(files, data_dir=None):
+    """Fingerprint data files by path, size and mtime"""
+    data_dir = data_dir or DATA_DIR
+    h = hashlib.sha1()
+    for file in files:
+        filepath = data_dir / file
+        stat = filepath.stat() if filepath.exists() else None
+        h.update(f"{file}:{stat.st_size if stat else -1}:{stat.st_mtime_ns if stat else -1};".encode())
+    return h.hexdigest()[:16]
 
-def search(query, domain=None, max_results=MAX_RESULTS):
-    """Main search function with auto-domain detection"""
-    if domain is None:
-        domain = detect_domain(query)
 
-    config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
-    filepath = DATA_DIR / config["file"]
+class _CursorStore:
+    """Bounded in-memory LRU of ranked hit lists; save() mirrors one to INDEX_DIR so a cursor survives across processes"""
 
-    if not filepath.exists():
-        return {"error": f"File not found: {filepath}", "domain": domain}
+    def __init__(self, directory, max_live=CURSOR_MAX_LIVE, ttl=CURSOR_TTL):
+        self.max_live = max_live
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.dir = directory
+        self.lock = threading.Lock()
 
-    results = _search_csv(filepath, config["search_cols"], config["output_cols"], query, max_results)
+    def put(self, key, entry):
+        entry["created"] = time.time()
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_live:
+                self.entries.popitem(last=False)
 
-    return {
-        "domain": domain,
-        "query": query,
-        "file": config["file"],
-        "count": len(results),
-        "results": results
-    }
+    def save(self, key):
+        """Write a live cursor to disk; the directory is pruned at most every CURSOR_PRUNE_EVERY seconds"""
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        try:
+            self.dir.mkdir(parents=True, exist_ok=True)
+            with open(self.dir / f"{key}.json", 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            stamp = self.dir / ".pruned"
+            if not stamp.exists() or time.time() - stamp.stat().st_mtime > CURSOR_PRUNE_EVERY:
+                stamp.touch()
+                self._prune()
+        except OSError:
+            pass  # Cursors still work in-process without a writable cache
 
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            try:
+                with open(self.dir / f"{key}.json", 'r', encoding='utf-8') as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+        with self.lock:
+            if time.time() - entry["created"] > self.ttl:
+                self.entries.pop(key, None)
+                return None
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+        return entry
 
-def search_stack(query, stack, max_results=MAX_RESULTS):
-    """Search stack-specific guidelines"""
-    if stack not in STACK_CONFIG:
-        return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+    def _prune(self):
+        """Drop expired cursor files and keep at most max_live on disk"""
+        files = sorted(self.dir.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        now = time.time()
+        for i, path in enumerate(files):
+            if i >= self.max_live or now - path.stat().st_mtime > self.ttl:
+                path.unlink(missing_ok=True)
 
-    filepath = DATA_DIR / STACK_CONFIG[stack]["file"]
 
-    if not filepath.exists():
-        return {"error": f"Stack file not found: {filepath}", "stack": stack}
+# ============ SUGGEST ============
+class _SuggestIndex:
+    """Sorted completion keys searched with bisect; short prefixes have precomputed answers"""
 
-    results = _search_csv(filepath, _STACK_COLS["search_cols"], _STACK_COLS["output_cols"], query, max_results)
+    PRECOMPUTED_PREFIX = 2
 
-    return {
-        "domain": "stack",
-        "stack": stack,
-        "query": query,
-        "file": STACK_CONFIG[stack]["file"],
-        "count": len(results),
-        "results": results
-    }
+    def __init__(self, entries):
+        merged = {}
+        for text, kind, domain, weight in entries:
+            key = _fold(text).casefold()
+            if key in merged:
+                merged[key]["weight"] += weight
+                if domain not in merged[key]["domains"]:
+                    merged[key]["domains"].append(domain)
+            else:
+                merged[key] = {"text": text, "kind": kind, "domains": [domain], "weight": weight}
+        self.keys = sorted(merged)
+        self.items = [merged[key] for key in self.keys]
+        self.top = {}
+        for length in range(1, self.PRECOMPUTED_PREFIX + 1):
+            groups = defaultdict(list)
+            for i, key in enumerate(self.keys):
+                if len(key) >= length:
+                    groups[key[:length]].append(i)
+            for prefix, ids in groups.items():
+                self.top[prefix] = heapq.nlargest(SUGGEST_LIMIT, ids, key=lambda i: self.items[i]["weight"])
 
+    def complete(self, prefix, limit=SUGGEST_LIMIT):
+        prefix = _fold(prefix).casefold()
+        if prefix in self.top and limit <= SUGGEST_LIMIT:
+            ids = self.top[prefix][:limit]
+        else:
+            lo = bisect.bisect_left(self.keys, prefix)
+            hi = bisect.bisect_left(self.keys, prefix + "\U0010ffff", lo)
+            ids = heapq.nlargest(limit, range(lo, hi), key=lambda i: self.items[i]["weight"])
+        return [self.items[i] for i in ids]
 
-def search_pattern(query, max_results=MAX_RESULTS):
-    """Search cross-platform UX patterns across all pattern files"""
-    all_results = []
-    pattern_cols = {
-        "search_cols": ["Pattern", "Intent", "Trigger"],
-        "output_cols": ["Pattern", "Intent", "Trigger", "Web", "Electron", "SwiftUI", "React Native", "Flutter", "Accessibility"]
-    }
 
-    for name, file in PATTERN_FILES.items():
-        filepath = DATA_DIR / file
-        if filepath.exists():
-            results = _search_csv(filepath, pattern_cols["search_cols"], pattern_cols["output_cols"], query, max_results)
-            for r in results:
-                r["_pattern_type"] = name
-            all_results.extend(results)
-
-    # Sort by relevance (re-rank if needed) and limit
-    return {
-        "domain": "pattern",
-        "query": query,
-        "count": len(all_results[:max_results]),
-        "results": all_results[:max_results]
-    }
+# ============ FACETS ============
+# ============ KNOWLEDGE BASE ============
+class _Table:
+    """One data file (or a tuple of files indexed together) loaded for a set of search columns;
+    indexes are built on first use and kept"""
 
+    def __init__(self, data_dir, index_dir, file, search_cols, version, bm25_params=(BM25_K1, BM25_B)):
+        self.file = file
+        self.files = (file,) if isinstance(file, str) else tuple(file)
+        self.search_cols = list(search_cols)
+        self.version = version
+        self.index_dir = index_dir
+        self.source = data_dir / file if isinstance(file, str) else None
+        self.analyzer = analyzer_for(self.files[0])
+        self.rows, self.origin = [], []  # origin: index into self.files per row
+        for i, part in enumerate(self.files):
+            rows = _load_csv(data_dir / part)
+            self.rows += rows
+            self.origin += [i] * len(rows)
+        self.documents = [" ".join(str(row.get(col, "")) for col in search_cols) for row in self.rows]
+        self.lock = threading.Lock()
+        self.bm25_params = bm25_params
+        self._bm25 = None
+        self._lsa = None
+        self._bitmaps = {}
+        self._offsets = None
+        self._terms = {}
+        self._alignments = None
 
-def search_platform(query, platform=None, max_results=MAX_RESULTS):
-    """Search platform-specific guidelines"""
-    platform_cols = {
-        "search_cols": ["Category", "Guideline", "Description"],
-        "output_cols": ["Category", "Guideline", "Description", "Do", "Don't", "Platform Notes"]
-    }
+    def bm25(self, positions=False):
+        """Fitted BM25; the positional index is added the first time a phrase/NEAR query needs it"""
+        bm25 = self._bm25
+        if bm25 is None or (positions and bm25.postings is None):
+            with self.lock:
+                if self._bm25 is None:
+                    self._bm25 = self._prebuilt_bm25() or self._fit_bm25()
+                if positions and self._bm25.postings is None:
+                    self._bm25._index_positions(self.documents)
+                bm25 = self._bm25
+        return bm25
+
+    def _fit_bm25(self):
+        fitted = BM25(*self.bm25_params, analyzer=self.analyzer)
+        fitted.fit(self.documents)
+        return fitted
+
+    def _prebuilt_bm25(self):
+        """BM25 index shipped inside a zipapp bundle, re-weighted if k1/b differ"""
+        if not isinstance(self.source, _BundlePath):
+            return None
+        fitted = self.source.bundle.load(f"bm25/{_bm25_key(self.file, self.search_cols)}")
+        if fitted is None or getattr(fitted, "analyzer", None) is None or fitted.analyzer.key != self.analyzer.key:
+            return None  # Bundle predates the current analyzer configuration
+        fitted.analyzer = self.analyzer
+        if (fitted.k1, fitted.b) != tuple(self.bm25_params):
+            fitted.reweight(*self.bm25_params)
+        return fitted
+
+    def lsa(self):
+        """LSA model for this file's search columns, loaded from or saved under index_dir per data version"""
+        if self._lsa is None:
+            with self.lock:
+                if self._lsa is None:
+                    key = hashlib.sha1(json.dumps(
+                        [self.file, self.search_cols, LSA_DIMENSIONS, self.version, self.analyzer.key]).encode()).hexdigest()[:20]
+                    path = self.index_dir / "lsa" / key
+                    try:
+                        lsa = LSA.load(path, self.analyzer)
+                    except (OSError, ValueError, KeyError):
+                        lsa = LSA(analyzer=self.analyzer)
+                        lsa.fit(self.documents)
+                        try:
+                            lsa.save(path)
+                        except OSError:
+                            pass
+                    self._lsa = lsa
+        return self._lsa
+
+    def offsets(self):
+        """Per row {search column: {term: [(start, end)]}}, recorded once from the analyzer's spans"""
+        if self._offsets is None:
+            with self.lock:
+                if self._offsets is None:
+                    offsets = []
+                    for row in self.rows:
+                        cols = {}
+                        for col in self.search_cols:
+                            terms = defaultdict(list)
+                            for term, start, end in self.analyzer.spans(row.get(col, "")):
+                                terms[term].append((start, end))
+                            if terms:
+                                cols[col] = dict(terms)
+                        offsets.append(cols)
+                    self._offsets = offsets
+        return self._offsets
+
+    def matches(self, query, idx, cols):
+        """{column: [[start, end]]} merged character ranges of query terms in row idx, from the stored offsets"""
+        terms = set(self.analyzer(strip_operators(query)))
+        stored = self.offsets()[idx]
+        matches = {}
+        for col in cols:
+            spans = sorted(span for term in terms for span in stored.get(col, {}).get(term, ()))
+            merged = []
+            for start, end in spans:
+                if merged and start <= merged[-1][1]:
+                    merged[-1][1] = max(merged[-1][1], end)
+                else:
+                    merged.append([start, end])
+            if merged:
+                matches[col] = merged
+        return matches
+
+    def terms(self, idx):
+        """Memoized set of analyzed search-column terms of row idx"""
+        terms = self._terms.get(idx)
+        if terms is None:
+            terms = self._terms.setdefault(idx, frozenset(self.analyzer(self.documents[idx])))
+        return terms
+
+    def similarity(self, a, b):
+        """Jaccard overlap of two rows' search-column terms"""
+        union = self.terms(a) | self.terms(b)
+        return len(self.terms(a) & self.terms(b)) / len(union) if union else 0.0
+
+    def alignments(self):
+        """Per row {file index: [row idx]} of its best counterparts in each other file, best first
+        (same Category favoured, see ALIGN_MIN_SCORE); computed once"""
+        if self._alignments is None:
+            with self.lock:
+                if self._alignments is None:
+                    categories = [_norm_value(row.get("Category")) for row in self.rows]
+                    alignments = []
+                    for idx in range(len(self.rows)):
+                        scored = defaultdict(list)
+                        for other in range(len(self.rows)):
+                            if self.origin[other] == self.origin[idx]:
+                                continue
+                            score = self.similarity(idx, other)
+                            if categories[idx] and categories[idx] == categories[other]:
+                                score += ALIGN_CATEGORY_BONUS
+                            if score >= ALIGN_MIN_SCORE:
+                                scored[self.origin[other]].append((score, other))
+                        alignments.append({part: [other for _, other in heapq.nlargest(ALIGN_CANDIDATES, pairs)]
+                                           for part, pairs in scored.items()})
+                    self._alignments = alignments
+        return self._alignments
+
+    def collapse(self, ranked, threshold=COLLAPSE_SIMILARITY):
+        """Drop ranked rows near-identical to a better one from another file; returns (kept, {idx: [collapsed idx]})"""
+        kept, collapsed = [], defaultdict(list)
+        for idx, score in ranked:
+            for best, _ in kept:
+                if self.origin[idx] != self.origin[best] and self.similarity(idx, best) >= threshold:
+                    collapsed[best].append(idx)
+                    break
+            else:
+                kept.append((idx, score))
+        return kept, collapsed
+
+    def _column_index(self, col):
+        """Memoized _column_bitmaps (bitmaps, labels) for one column"""
+        index = self._bitmaps.get(col)
+        if index is None:
+            index = self._bitmaps.setdefault(col, _column_bitmaps(self.rows, col))
+        return index
+
+    def column_bitmaps(self, col):
+        """{normalized value: bitmap} for one column"""
+        return self._column_index(col)[0]
+
+    def column_labels(self, col):
+        """{normalized value: display value} for one column"""
+        return self._column_index(col)[1]
+
+    def filter(self, where):
+        """AND together per-column bitmaps; values within a column are ORed (Severity=High,Critical).
+
+        Raises ValueError for a column the file does not have.
+        """
+        if not self.rows:
+            return 0
+        headers = {col.casefold(): col for col in self.rows[0]}
+        for col in where:
+            if col.casefold() not in headers:
+                raise ValueError(f"Unknown filter column: {col}. Available: {', '.join(self.rows[0])}")
+        selected = (1 << len(self.rows)) - 1
+        for col, values in where.items():
+            bitmaps = self.column_bitmaps(headers[col.casefold()])
+            if isinstance(values, str):
+                values = values.split(",")
+            column_bits = 0
+            for value in values:
+                column_bits |= bitmaps.get(_norm_value(value), 0)
+            selected &= column_bits
+        return selected
+
+    def rank(self, query, candidates, engine, top):
+        """Rank documents with the selected engine; returns [(idx, score)] with score > 0, best first"""
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine: {engine}. Available: {', '.join(ENGINES)}")
+
+        bm25_scores = []
+        proximity = bool(_PHRASE_RE.search(query) or _NEAR_RE.search(query))
+        if engine in ("bm25", "hybrid") or proximity:
+            bm25 = self.bm25(positions=proximity)
+            candidates = bm25.constrain(query, candidates)
+            if engine in ("bm25", "hybrid"):
+                bm25_scores = bm25.score(query, candidates, top if engine == "bm25" else None)
+            if engine == "bm25":
+                return [(idx, score) for idx, score in bm25_scores[:top] if score > 0]
+
+        lsa_scores = self.lsa().score(query, candidates)
+        if engine == "lsa":
+            return [(idx, score) for idx, score in lsa_scores[:top] if score >= LSA_MIN_SCORE]
+
+        # Hybrid: max-normalized BM25 blended with cosines above the LSA floor
+        best = bm25_scores[0][1] if bm25_scores and bm25_scores[0][1] > 0 else 1.0
+        fused = defaultdict(float)
+        for idx, score in bm25_scores:
+            fused[idx] += HYBRID_WEIGHT * score / best
+        for idx, score in lsa_scores:
+            if score >= LSA_MIN_SCORE:
+                fused[idx] += (1 - HYBRID_WEIGHT) * score
+        ranked = heapq.nlargest(top, fused.items(), key=lambda x: x[1])
+        return [(idx, score) for idx, score in ranked if score > 0]
+
+    def explain(self, query, idx, score, engine):
+        """Why a row ranked: its score, BM25 per-term breakdown from the stored impacts, matched columns"""
+        tokenize = self.analyzer
+        info = {"score": round(score, 4)}
+        if engine != "bm25":
+            info["engine"] = engine
+        if self._bm25 is not None:
+            info["terms"] = self._bm25.explain(query, idx)
+            if engine != "bm25":
+                info["bm25"] = round(sum(term["contribution"] for term in info["terms"]), 4)
+        terms = set(tokenize(strip_operators(query)))
+        row = self.rows[idx]
+        info["matched_cols"] = [col for col in self.search_cols if terms & set(tokenize(row.get(col, "")))]
+        return info
+
+
+class KnowledgeBase:
+    """Search API over one data directory (or data pack) that keeps loaded files and indexes warm between calls.
+
+    Read-mostly and safe to share across threads: locks are taken only while a
+    file or index is lazily built. Files are reloaded when their size or mtime
+    changes.
+    """
+
+    def __init__(self, data_dir=None, k1=BM25_K1, b=BM25_B):
+        self.bm25_params = (k1, b)
+        if data_dir is None:
+            self.data_dir, self.index_dir = DATA_DIR, INDEX_DIR
+        else:
+            self.data_dir, self.index_dir = _open_data(Path(data_dir))
+        self.cursors = _CursorStore(self.index_dir / "cursors")
+        self._tables = {}
+        self._tokens = {}
+        self._suggest = {}
+        self._locks = {}
+
+    def _lock(self, key):
+        return self._locks.setdefault(key, threading.Lock())
+
+    def version(self, files):
+        """Fingerprint data files by path, size and mtime"""
+        return _data_version(files, self.data_dir)
+
+    def table(self, file, search_cols):
+        """Loaded _Table for a data file or tuple of files (None when any is missing), rebuilt when one changes"""
+        files = [file] if isinstance(file, str) else list(file)
+        if not all((self.data_dir / f).exists() for f in files):
+            return None
+        key = (file, tuple(search_cols))
+        version = self.version(files)
+        table = self._tables.get(key)
+        if table is None or table.version != version:
+            with self._lock(key):
+                table = self._tables.get(key)
+                if table is None or table.version != version:
+                    table = _Table(self.data_dir, self.index_dir, file, search_cols, version, self.bm25_params)
+                    self._tables[key] = table
+        return table
+
+    def reweight(self, k1=None, b=None):
+        """Switch BM25 k1/b, re-indexing impacts of already loaded tables in place"""
+        k1 = self.bm25_params[0] if k1 is None else k1
+        b = self.bm25_params[1] if b is None else b
+        self.bm25_params = (k1, b)
+        for table in list(self._tables.values()):
+            with table.lock:
+                table.bm25_params = self.bm25_params
+                if table._bm25 is not None:
+                    fitted = copy.copy(table._bm25)  # Readers keep the old weights until the swap
+                    fitted.reweight(k1, b)
+                    table._bm25 = fitted
+
+    def _rank_csv(self, file, search_cols, query, depth, where=None, engine="bm25"):
+        """Ranked [(idx, score, tags)] hits of one file or tuple of files, best first.
+
+        `where` maps column names to required values; rows failing it are removed
+        via bitmaps before any scoring happens. With `where` and a blank query the
+        matching rows come back unscored, in table order. `engine` selects the
+        ranker. For a tuple of files, near-identical rows from different files are
+        collapsed and each hit's tags list its source files (`_files`).
+        """
+        table = self.table(file, search_cols)
+        if table is None:
+            return []
+
+        candidates = None
+        if where:
+            candidates = _bitmap_rows(table.filter(where))
+            if not candidates:
+                return []
+
+        if candidates is not None and not strip_operators(query).strip():
+            ranked = [(idx, 0.0) for idx in candidates[:depth]]
+        else:
+            ranked = table.rank(query, candidates, engine, depth)
+        if len(table.files) == 1:
+            return [(idx, score, {}) for idx, score in ranked]
+        ranked, collapsed = table.collapse(ranked)
+        return [(idx, score, {"_files": [table.files[table.origin[i]] for i in [idx] + collapsed.get(idx, [])]})
+                for idx, score in ranked]
+
+    def _materialize(self, sources, hits, query, fields=None, engine="bm25", explain=False, highlight=False):
+        """Yield result rows for [source, idx, score, tags] hits, materializing only the projected columns.
+
+        `explain` attaches an `_explain` breakdown to each result, `highlight`
+        the character ranges of query terms per search column (`_matches`).
+        """
+        tables = {}
+        for src, idx, score, tags in hits:
+            source = sources[src]
+            if "tokens" in source:
+                yield dict(self._token_items(source["tokens"])[idx], **tags)
+                continue
+            table = tables.get(src)
+            if table is None:
+                file = source["file"]
+                table = tables[src] = self.table(file if isinstance(file, str) else tuple(file), source["search_cols"])
+                if explain and engine != "lsa":
+                    table.bm25()  # Per-term breakdown comes from the fitted index
+            cols = _select_cols(source["output_cols"], fields)
+            row = table.rows[idx]
+            result = {col: row.get(col, "") for col in cols if col in row}
+            result.update(tags)
+            if explain:
+                result["_explain"] = table.explain(query, idx, score, engine)
+            if highlight:
+                matches = table.matches(query, idx, cols)
+                if matches:
+                    result["_matches"] = matches
+            yield result
+
+    # ---------- cursors ----------
+    def _paginate(self, meta, sources, hits, max_results, files, fields=None, stream=False):
+        """Return the first page of ranked hits, keeping the full hit list behind an in-memory cursor"""
+        _check_fields(sources, fields)
+        entry = {"meta": meta, "sources": sources, "hits": hits, "fields": fields, "files": list(files)}
+        cursor = None
+        if len(hits) > max_results:
+            entry["version"] = self.version(files)
+            key = hashlib.sha1(json.dumps([meta, fields, entry["version"]], sort_keys=True).encode()).hexdigest()[:20]
+            self.cursors.put(key, entry)
+            cursor = key
+        return self._page(entry, cursor, 0, max_results, fields, stream)
+
+    def _page(self, entry, key, offset, max_results, fields, stream=False):
+        """One page of a cursor entry, materialized from its hits (lazily, as a generator, when streaming)"""
+        meta = entry["meta"]
+        hits = entry["hits"][offset:offset + max_results]
+        rows = self._materialize(entry["sources"], hits, meta["query"], fields, meta.get("engine", "bm25"),
+                                 meta.get("explain", False), meta.get("highlight", False))
+        result = dict(meta, offset=offset) if offset else dict(meta)
+        result.update(count=len(hits), results=rows if stream else list(rows))
+        if key and offset + max_results < len(entry["hits"]):
+            result["cursor"] = f"{key}.{offset + max_results}"
+        return result
+
+    def next_page(self, cursor, max_results=MAX_RESULTS, fields=None, stream=False):
+        """Return the page of cached ranked hits that a cursor points at, without re-scoring.
+
+        `fields` re-projects the page; by default the search's own projection is kept.
+        With `stream`, results are a generator that materializes rows as they are consumed.
+        """
+        key, _, offset = cursor.partition(".")
+        entry = self.cursors.get(key)
+        if entry is None or not offset.isdigit():
+            return {"error": f"Unknown or expired cursor: {cursor}"}
+        if self.version(entry["files"]) != entry["version"]:
+            return {"error": "Cursor is stale: data files changed since the search ran"}
+        _check_fields(entry["sources"], fields)
+        return self._page(entry, key, int(offset), max_results, entry["fields"] if fields is None else fields, stream)
+
+    def save_cursor(self, cursor):
+        """Persist a cursor so a later process can page on (the CLI saves the cursors it prints)"""
+        self.cursors.save(cursor.partition(".")[0])
+
+    # ---------- search ----------
+    @staticmethod
+    def _meta(meta, where, engine, explain, highlight):
+        """Add the search options that shape results to a result header"""
+        if where:
+            meta["where"] = where
+        if engine != "bm25":
+            meta["engine"] = engine
+        if explain:
+            meta["explain"] = True
+        if highlight:
+            meta["highlight"] = True
+        return meta
+
+    def search(self, query, domain=None, max_results=MAX_RESULTS, fields=None, where=None, engine="bm25", explain=False, highlight=False,
+               stream=False):
+        """Main search function with auto-domain detection"""
+        candidates = None
+        if domain is None:
+            candidates = rank_domains(query)
+            domain = candidates[0][0] if candidates else "style"
+
+        config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+        filepath = self.data_dir / config["file"]
 
-    if platform and platform in PLATFORM_FILES:
-        # Search specific platform
-        filepath = DATA_DIR / PLATFORM_FILES[platform]
         if not filepath.exists():
-            return {"error": f"Platform file not found: {filepath}"}
+            return {"error": f"File not found: {filepath}", "domain": domain}
+
+        depth = max(max_results, CURSOR_DEPTH)
+        source = {"file": config["file"], "search_cols": config["search_cols"], "output_cols": config["output_cols"]}
+        hits = [(0, idx, score, tags) for idx, score, tags in
+                self._rank_csv(config["file"], config["search_cols"], query, depth, where, engine)]
+
+        meta = self._meta({"domain": domain, "query": query, "file": config["file"]}, where, engine, explain, highlight)
+        if candidates:
+            meta["domain_candidates"] = [{"domain": d, "confidence": c} for d, c in candidates]
+        return self._paginate(meta, [source], hits, max_results, [config["file"]], fields, stream)
+
+    def search_stack(self, query, stack, max_results=MAX_RESULTS, fields=None, where=None, engine="bm25", explain=False, highlight=False,
+                     stream=False):
+        """Search stack-specific guidelines.
+
+        `stack` may be a list: the stacks are then ranked as one combined index
+        (shared BM25 statistics, cached per stack set), each result is tagged with
+        `_stack`, and near-identical guidelines from different stacks are
+        collapsed into the best-ranked one (`_stack` lists them all).
+        """
+        stacks = [stack] if isinstance(stack, str) else list(dict.fromkeys(stack))
+        unknown = [s for s in stacks if s not in STACK_CONFIG]
+        if unknown or not stacks:
+            return {"error": f"Unknown stack: {', '.join(unknown) or '(none)'}. Available: {', '.join(AVAILABLE_STACKS)}"}
+
+        files = [STACK_CONFIG[s]["file"] for s in stacks]
+        for s, file in zip(stacks, files):
+            filepath = self.data_dir / file
+            if not filepath.exists():
+                return {"error": f"Stack file not found: {filepath}", "stack": s}
+
+        depth = max(max_results, CURSOR_DEPTH)
+        file = files[0] if len(files) == 1 else tuple(files)
+        source = {"file": file, "search_cols": _STACK_COLS["search_cols"], "output_cols": _STACK_COLS["output_cols"]}
+        names = dict(zip(files, stacks))
+        hits = []
+        for idx, score, tags in self._rank_csv(file, _STACK_COLS["search_cols"], query, depth, where, engine):
+            if "_files" in tags:
+                tags = {"_stack": ", ".join(names[f] for f in tags["_files"])}
+            hits.append((0, idx, score, tags))
+
+        meta = self._meta({"domain": "stack", "stack": ",".join(stacks), "query": query, "file": ", ".join(files)},
+                          where, engine, explain, highlight)
+        return self._paginate(meta, [source], hits, max_results, files, fields, stream)
+
+    def search_pattern(self, query, max_results=MAX_RESULTS, fields=None, where=None, engine="bm25", explain=False, highlight=False,
+                       stream=False):
+        """Search cross-platform UX patterns across all pattern files"""
+        depth = max(max_results, CURSOR_DEPTH)
+        pattern_cols = {
+            "search_cols": ["Pattern", "Intent", "Trigger"],
+            "output_cols": ["Pattern", "Intent", "Trigger", "Web", "Electron", "SwiftUI", "React Native", "Flutter", "Accessibility"]
+        }
+
+        sources, hits = [], []
+        for name, file in PATTERN_FILES.items():
+            sources.append(dict(pattern_cols, file=file))
+            hits += [(len(sources) - 1, idx, score, {"_pattern_type": name}) for idx, score, _ in
+                     self._rank_csv(file, pattern_cols["search_cols"], query, depth, where, engine)]
+
+        meta = self._meta({"domain": "pattern", "query": query}, where, engine, explain, highlight)
+        return self._paginate(meta, sources, hits, max_results, PATTERN_FILES.values(), fields, stream)
+
+    def search_platform(self, query, platform=None, max_results=MAX_RESULTS, fields=None, where=None, engine="bm25", explain=False, highlight=False,
+                        stream=False):
+        """Search platform-specific guidelines"""
+        platform_cols = _PLATFORM_COLS
+        depth = max(max_results, CURSOR_DEPTH)
+
+        if platform and platform in PLATFORM_FILES:
+            # Search specific platform
+            filepath = self.data_dir / PLATFORM_FILES[platform]
+            if not filepath.exists():
+                return {"error": f"Platform file not found: {filepath}"}
+            platforms = {platform: PLATFORM_FILES[platform]}
+            meta = {"domain": "platform", "platform": platform, "query": query}
+        else:
+            # Search all platforms
+            platforms = PLATFORM_FILES
+            meta = {"domain": "platform", "query": query}
+
+        sources, hits = [], []
+        for name, file in platforms.items():
+            sources.append(dict(platform_cols, file=file))
+            tags = {} if len(platforms) == 1 else {"_platform": name}
+            hits += [(len(sources) - 1, idx, score, tags) for idx, score, _ in
+                     self._rank_csv(file, platform_cols["search_cols"], query, depth, where, engine)]
+
+        meta = self._meta(meta, where, engine, explain, highlight)
+        return self._paginate(meta, sources, hits, max_results, platforms.values(), fields, stream)
+
+    # ---------- cross-platform comparison ----------
+    def compare(self, query, max_results=MAX_RESULTS, engine="bm25"):
+        """Side-by-side matrix of how each platform handles a query.
 
-        results = _search_csv(filepath, platform_cols["search_cols"], platform_cols["output_cols"], query, max_results)
+        Matching patterns contribute their per-platform columns. Guidelines are
+        ranked in one index over all platform files; each hit becomes a matrix row
+        filled with its best precomputed counterpart in each other platform's file
+        that no earlier row already shows; hits already placed are skipped.
+        """
+        names = list(PLATFORM_FILES)
+        files = tuple(PLATFORM_FILES.values())
+        table = self.table(files, _PLATFORM_COLS["search_cols"])
+        if table is None:
+            missing = [f for f in files if not (self.data_dir / f).exists()]
+            return {"error": f"Platform file not found: {self.data_dir / missing[0]}"}
+
+        patterns = []
+        for row in self.search_pattern(query, max_results, engine=engine).get("results", [])[:max_results]:
+            patterns.append({"Pattern": row.get("Pattern", ""), "Intent": row.get("Intent", ""),
+                             "_pattern_type": row.get("_pattern_type"),
+                             "platforms": {name: row.get(col, "") for name, col in PATTERN_PLATFORM_COLS.items() if row.get(col)}})
+
+        alignments = table.alignments()
+        cols = [col for col in _PLATFORM_COLS["output_cols"] if col != "Category"]
+        guidelines, placed = [], set()
+        for idx, score in table.rank(query, None, engine, max(max_results, CURSOR_DEPTH)):
+            if idx in placed:
+                continue
+            cells = {table.origin[idx]: idx}
+            for part, others in alignments[idx].items():
+                other = next((i for i in others if i not in placed), None)
+                if other is not None:
+                    cells[part] = other
+            placed.update(cells.values())
+            guidelines.append({
+                "Category": table.rows[idx].get("Category", ""),
+                "anchor": names[table.origin[idx]],
+                "score": round(score, 4),
+                "platforms": {names[part]: {col: table.rows[i].get(col, "") for col in cols}
+                              for part, i in sorted(cells.items())}
+            })
+            if len(guidelines) == max_results:
+                break
+
+        meta = {"domain": "compare", "query": query, "platforms": names}
+        if engine != "bm25":
+            meta["engine"] = engine
+        return dict(meta, count=len(guidelines), patterns=patterns, guidelines=guidelines)
+
+    def _token_items(self, name):
+        """Flattened {key, value} items of one token file, reloaded when it changes"""
+        file = TOKEN_FILES[name]
+        version = self.version([file])
+        cached = self._tokens.get(name)
+        if cached is None or cached[0] != version:
+            with (self.data_dir / file).open('r', encoding='utf-8') as f:
+                cached = (version, _flatten_json(json.load(f)))
+            self._tokens[name] = cached
+        return cached[1]
+
+    def search_tokens(self, query, token_type=None, max_results=TOKEN_MAX_RESULTS):
+        """Search design tokens (spacing, typography, color, motion)"""
+        sources, hits = [], []
+        files = [token_type] if token_type and token_type in TOKEN_FILES else TOKEN_FILES.keys()
+        query_lower = query.lower()
+
+        for name in files:
+            if (self.data_dir / TOKEN_FILES[name]).exists():
+                sources.append({"tokens": name})
+                for i, item in enumerate(self._token_items(name)):
+                    if query_lower in item["key"].lower() or query_lower in item["value"].lower():
+                        hits.append((len(sources) - 1, i, 0, {"_token_type": name}))
+
+        meta = {"domain": "token", "query": query, "token_type": token_type}
+        return self._paginate(meta, sources, hits, max_results, [TOKEN_FILES[name] for name in files])
+
+    # ---------- suggest ----------
+    def _suggest_entries(self, scope):
+        """(text, kind, domain, weight) tuples: vocabulary by document frequency, titles boosted, token paths"""
+        kind, _, names = (scope or "").partition(":")
+        names = names.split(",") if names else None
+        sources = []
+        if scope is None or kind == "stack":
+            sources += [("stack", STACK_CONFIG[s]["file"], _STACK_COLS["search_cols"], SUGGEST_TITLE_COLS["stack"])
+                        for s in names or AVAILABLE_STACKS]
+        for domain, config in CSV_CONFIG.items():
+            if scope in (None, domain):
+                sources.append((domain, config["file"], config["search_cols"],
+                                SUGGEST_TITLE_COLS.get(domain, config["output_cols"][0])))
+
+        entries = []
+        for domain, file, search_cols, title_col in sources:
+            table = self.table(file, search_cols)
+            if table is None:
+                continue
+            doc_freqs = defaultdict(int)
+            titles = defaultdict(int)
+            for row, document in zip(table.rows, table.documents):
+                for word in set(table.analyzer(document)):
+                    doc_freqs[word] += 1
+                if row.get(title_col):
+                    titles[row[title_col].strip()] += 1
+            entries += [(word, "term", domain, df) for word, df in doc_freqs.items()]
+            entries += [(title, "title", domain, n * SUGGEST_TITLE_BOOST) for title, n in titles.items()]
+
+        if scope is None or kind == "token":
+            for name, file in TOKEN_FILES.items():
+                filepath = self.data_dir / file
+                if filepath.exists() and (names is None or name in names):
+                    with filepath.open('r', encoding='utf-8') as f:
+                        data = json.load(f)
+                    stack = [("", data)]
+                    while stack:
+                        prefix, obj = stack.pop()
+                        for key, value in obj.items():
+                            path = f"{prefix}.{key}" if prefix else key
+                            entries.append((path, "token", f"token:{name}", 1))
+                            if isinstance(value, dict):
+                                stack.append((path, value))
+        return entries
+
+    def suggest(self, prefix, domain=None, limit=SUGGEST_LIMIT):
+        """Type-ahead completions for a prefix from vocabulary, row titles and token paths.
+
+        `domain` scopes them: a CSV domain, "stack" or "token" for all stacks or
+        token files, "stack:<name>[,<name>]" or "token:<name>[,<name>]" for some.
+        """
+        kind, _, names = (domain or "").partition(":")
+        if names:
+            available = {"stack": AVAILABLE_STACKS, "token": list(TOKEN_FILES)}.get(kind, [])
+            if not available or any(n not in available for n in names.split(",")):
+                return {"error": f"Unknown suggest scope: {domain}. Available: {', '.join(available) or 'stack:<name>, token:<name>'}"}
+        index = self._suggest.get(domain)
+        if index is None:
+            with self._lock(("suggest", domain)):
+                index = self._suggest.get(domain)
+                if index is None:
+                    index = self._suggest[domain] = _SuggestIndex(self._suggest_entries(domain))
+        results = index.complete(prefix.strip(), limit)
         return {
-            "domain": "platform",
-            "platform": platform,
-            "query": query,
+            "domain": "suggest",
+            "query": prefix,
+            "scope": domain or "all",
             "count": len(results),
-            "results": results
+            "results": [dict(r, domains=list(r["domains"])) for r in results]
         }
-    else:
-        # Search all platforms
-        all_results = []
-        for name, file in PLATFORM_FILES.items():
-            filepath = DATA_DIR / file
-            if filepath.exists():
-                results = _search_csv(filepath, platform_cols["search_cols"], platform_cols["output_cols"], query, max_results)
-                for r in results:
-                    r["_platform"] = name
-                all_results.extend(results)
+
+    # ---------- recommendation pipeline ----------
+    def recommend(self, query, stack="html-tailwind", max_results=MAX_RESULTS, engine="bm25"):
+        """Product -> style/typography/color/landing/ux/stack recommendations in one process.
+
+        The query is normalized once; the best `product` row's style and landing
+        recommendations seed the downstream queries, which then run concurrently.
+        """
+        if stack not in STACK_CONFIG:
+            return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+
+        started = time.perf_counter()
+        base = " ".join(BM25().tokenize(strip_operators(query))) or query
+        product = self.search(base, "product", 1, engine=engine)
+        top = product["results"][0] if product.get("results") else {}
+
+        style_hint = top.get("Primary Style Recommendation", "")
+        landing_hint = top.get("Landing Page Pattern", "")
+        queries = {
+            "style": (self.search, (style_hint or base, "style", max_results)),
+            "typography": (self.search, (f"{base} {style_hint}", "typography", max_results)),
+            "color": (self.search, (f"{top.get('Product Type', '')} {base}", "color", max_results)),
+            "landing": (self.search, (landing_hint or base, "landing", max_results)),
+            "ux": (self.search, (base, "ux", max_results)),
+            "stack": (self.search_stack, (base, stack, max_results)),
+        }
+        with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+            futures = {name: pool.submit(fn, *args, engine=engine) for name, (fn, args) in queries.items()}
+            sections = {"product": product}
+            sections.update((name, future.result()) for name, future in futures.items())
 
         return {
-            "domain": "platform",
+            "domain": "recommend",
             "query": query,
-            "count": len(all_results[:max_results]),
-            "results": all_results[:max_results]
+            "stack": stack,
+            "product": top.get("Product Type"),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+            "sections": sections
         }
 
+    # ---------- facets ----------
+    def facets(self, domain=None, query=None, stack=None, where=None, columns=None):
+        """Value counts for the categorical columns (`facet_cols`) of a domain or stack.
+
+        Counts come from intersecting per-value bitmaps with the set of rows that
+        match `query` (any BM25 score, honoring phrases and NEAR/k) and `where`;
+        without either, the whole file is counted.
+        """
+        if stack:
+            if stack not in STACK_CONFIG:
+                return {"error": f"Unknown stack: {stack}. Available: {', '.join(AVAILABLE_STACKS)}"}
+            file, search_cols = STACK_CONFIG[stack]["file"], _STACK_COLS["search_cols"]
+            facet_cols = _STACK_COLS["facet_cols"]
+            meta = {"domain": "stack", "stack": stack}
+        else:
+            if domain is None:
+                domain = detect_domain(query) if query else "style"
+            config = CSV_CONFIG.get(domain, CSV_CONFIG["style"])
+            file, search_cols = config["file"], config["search_cols"]
+            facet_cols = config.get("facet_cols", [])
+            meta = {"domain": domain}
+
+        table = self.table(file, search_cols)
+        if table is None:
+            return {"error": f"File not found: {self.data_dir / file}", **meta}
+
+        data = table.rows
+        selected = table.filter(where) if where else (1 << len(data)) - 1
+        if query:
+            matched = 0
+            proximity = bool(_PHRASE_RE.search(query) or _NEAR_RE.search(query))
+            for idx, score in table.bm25(positions=proximity).score(query, _bitmap_rows(selected)):
+                if score > 0:
+                    matched |= 1 << idx
+            selected = matched
+
+        if columns:
+            wanted = {col.casefold() for col in columns}
+            columns = [col for col in (data[0] if data else []) if col.casefold() in wanted]
+        else:
+            columns = [col for col in facet_cols if data and col in data[0]]
+
+        counts = {}
+        for col in columns:
+            labels = table.column_labels(col)
+            values = []
+            for value, bitmap in table.column_bitmaps(col).items():
+                count = bin(bitmap & selected).count("1")
+                if value and count:
+                    values.append({"value": labels[value], "count": count})
+            counts[col] = sorted(values, key=lambda v: -v["count"])
+
+        return dict(meta, query=query, file=file, where=where or None, total=bin(selected).count("1"), facets=counts)
+
+
+# ============ MODULE API ============
+# Thin wrappers over a default KnowledgeBase for the bundled (or shared) data directory
+_KB = KnowledgeBase()
+
+
+def search(query, domain=None, max_results=MAX_RESULTS, fields=None, where=None, engine="bm25", explain=False, highlight=False,
+           stream=False):
+    """Main search function with auto-domain detection"""
+    return _KB.search(query, domain, max_results, fields, where, engine, explain, highlight, stream)
+
+
+def search_stack(query, stack, max_results=MAX_RESULTS, fields=None, where=None, engine="bm25", explain=False, highlight=False,
+                 stream=False):
+    """Search stack-specific guidelines (a list of stacks is searched as one combined index)"""
+    return _KB.search_stack(query, stack, max_results, fields, where, engine, explain, highlight, stream)
+
+
+def search_pattern(query, max_results=MAX_RESULTS, fields=None, where=None, engine="bm25", explain=False, highlight=False,
+                   stream=False):
+    """Search cross-platform UX patterns across all pattern files"""
+    return _KB.search_pattern(query, max_results, fields, where, engine, explain, highlight, stream)
+
 
-def search_tokens(query, token_type=None):
+def search_platform(query, platform=None, max_results=MAX_RESULTS, fields=None, where=None, engine="bm25", explain=False, highlight=False,
+                    stream=False):
+    """Search platform-specific guidelines"""
+    return _KB.search_platform(query, platform, max_results, fields, where, engine, explain, highlight, stream)
+
+
+def compare(query, max_results=MAX_RESULTS, engine="bm25"):
+    """Cross-platform matrix of matching patterns and aligned platform guidelines"""
+    return _KB.compare(query, max_results, engine)
+
+
+def search_tokens(query, token_type=None, max_results=TOKEN_MAX_RESULTS):
     """Search design tokens (spacing, typography, color, motion)"""
-    def flatten_json(obj, prefix=""):
-        """Flatten nested JSON to searchable strings"""
-        items = []
-        if isinstance(obj, dict):
-            for k, v in obj.items():
-                new_key = f"{prefix}.{k}" if prefix else k
-                if isinstance(v, dict):
-                    items.extend(flatten_json(v, new_key))
-                else:
-                    items.append({"key": new_key, "value": str(v)})
-        return items
+    return _KB.search_tokens(query, token_type, max_results)
 
-    def search_in_json(data, query):
-        """Search flattened JSON for query matches"""
-        flat = flatten_json(data)
-        query_lower = query.lower()
-        matches = []
-        for item in flat:
-            if query_lower in item["key"].lower() or query_lower in item["value"].lower():
-                matches.append(item)
-        return matches
 
-    results = []
-    files = [token_type] if token_type and token_type in TOKEN_FILES else TOKEN_FILES.keys()
-
-    for name in files:
-        filepath = DATA_DIR / TOKEN_FILES[name]
-        if filepath.exists():
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            matches = search_in_json(data, query)
-            for m in matches:
-                m["_token_type"] = name
-            results.extend(matches)
-
-    return {
-        "domain": "token",
-        "query": query,
-        "token_type": token_type,
-        "count": len(results),
-        "results": results[:20]  # Limit token results
-    }
+def next_page(cursor, max_results=MAX_RESULTS, fields=None, stream=False):
+    """Return the page of cached ranked results that a cursor points at, without re-scoring"""
+    return _KB.next_page(cursor, max_results, fields, stream)
+
+
+def save_cursor(cursor):
+    """Persist a cursor so a later process can page on"""
+    _KB.save_cursor(cursor)
+
+
+def suggest(prefix, domain=None, limit=SUGGEST_LIMIT):
+    """Type-ahead completions for a prefix from vocabulary, row titles and token paths (scoped by `domain`)"""
+    return _KB.suggest(prefix, domain, limit)
+
+
+def recommend(query, stack="html-tailwind", max_results=MAX_RESULTS, engine="bm25"):
+    """Product -> style/typography/color/landing/ux/stack recommendations in one process"""
+    return _KB.recommend(query, stack, max_results, engine)
+
+
+def facets(domain=None, query=None, stack=None, where=None, columns=None):
+    """Value counts for the categorical columns of a domain or stack"""
+    return _KB.facets(domain, query, stack, where, columns)
 
 
 AVAILABLE_PLATFORMS = list(PLATFORM_FILES.keys())
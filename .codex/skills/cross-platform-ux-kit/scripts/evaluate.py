@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Evaluate - relevance and latency of a ranking engine on labeled queries
+Usage: python evaluate.py [--engine bm25|lsa|hybrid] [--k 5] [--domain <d>] [--stack <s>]
+       python evaluate.py --engine hybrid --baseline-engine bm25 [--tolerance 0.02]
+       python evaluate.py --queries labels.json [--json]
+
+Each labeled query maps row titles (the domain's title column, see
+SUGGEST_TITLE_COLS) to a graded relevance: 2 = the row a user is after,
+1 = also relevant. Reports NDCG@k and recall@k per query, per domain and
+overall, next to per-query latency. With --baseline-engine the candidate is
+accepted only if its NDCG@k and recall@k stay within --tolerance of the
+baseline's (exit code 1 otherwise).
+"""
+
+import argparse
+import json
+import sys
+import time
+from math import log2
+
+from core import CSV_CONFIG, ENGINES, STACK_CONFIG, SUGGEST_TITLE_COLS, KnowledgeBase
+from bench import summarize
+
+DEFAULT_K = 5
+TOLERANCE = 0.02
+ROUNDS = 3
+
+# Hand-labeled judgments: {domain: [(query, {row title: grade})]}
+EVAL_QUERIES = {
+    "style": [
+        ("glassmorphism frosted blur", {"Glassmorphism": 2, "Liquid Glass": 1, "Aurora UI": 1}),
+        ("minimal clean whitespace", {"Minimalism & Swiss Style": 2, "Exaggerated Minimalism": 1, "Minimal & Direct": 1, "Swiss Modernism 2.0": 1}),
+        ("bold raw brutalism", {"Brutalism": 2, "Neubrutalism": 2}),
+        ("dashboard kpi data", {"Data-Dense Dashboard": 2, "Executive Dashboard": 1, "Financial Dashboard": 1, "Real-Time Monitoring": 1}),
+    ],
+    "prompt": [
+        ("soft shadow extruded", {"Neumorphism": 2, "Soft UI Evolution": 1, "Claymorphism": 1}),
+        ("retro 8-bit pixel", {"Pixel Art": 2, "Retro-Futurism": 1}),
+    ],
+    "color": [
+        ("fintech crypto", {"Fintech/Crypto": 2, "NFT/Web3 Platform": 1, "Banking/Traditional Finance": 1}),
+        ("healthcare clinic", {"Healthcare App": 2, "Medical Clinic": 2, "Dental Practice": 1, "Pharmacy/Drug Store": 1}),
+        ("gaming", {"Gaming": 2}),
+    ],
+    "chart": [
+        ("trend over time", {"Trend Over Time": 2, "Time-Series Forecast": 1, "Cumulative Changes": 1}),
+        ("funnel conversion", {"Funnel/Flow": 2}),
+        ("part of whole percentage", {"Part-to-Whole": 2, "Proportional/Percentage": 2, "Hierarchical Proportional": 1}),
+    ],
+    "landing": [
+        ("pricing plans", {"Pricing Page + CTA": 2, "Pricing-Focused Landing": 2, "Comparison Table + CTA": 1}),
+        ("waitlist launch coming soon", {"Waitlist/Coming Soon": 2}),
+        ("testimonials social proof", {"Hero + Testimonials + CTA": 2, "Product Review/Ratings Focused": 1}),
+    ],
+    "product": [
+        ("saas", {"SaaS (General)": 2, "Micro SaaS": 2, "B2B Service": 1}),
+        ("ecommerce luxury", {"E-commerce Luxury": 2, "E-commerce": 1, "Luxury/Premium Brand": 1}),
+        ("beauty spa wellness", {"Beauty/Spa/Wellness Service": 2, "Fitness/Gym App": 1, "Mental Health App": 1}),
+    ],
+    "ux": [
+        ("touch target size", {"Touch Target Size": 2, "Touch Spacing": 1, "Touch Friendly": 1}),
+        ("loading state feedback", {"Loading States": 2, "Loading Indicators": 2, "Loading Buttons": 1, "Progress Indicators": 1}),
+        ("form validation error", {"Inline Validation": 2, "Error Messages": 2, "Error Placement": 1, "Error Feedback": 1}),
+        ("reduced motion", {"Reduced Motion": 2, "Motion Sensitivity": 1, "Excessive Motion": 1}),
+    ],
+    "typography": [
+        ("elegant luxury serif", {"Luxury Serif": 2, "Classic Elegant": 2, "Real Estate Luxury": 1, "Luxury Minimalist": 1}),
+        ("developer code monospace", {"Developer Mono": 2, "Tech/HUD Mono": 1}),
+    ],
+    "icons": [
+        ("settings", {"settings": 2}),
+        ("delete remove", {"trash-2": 2, "x": 1, "minus": 1}),
+        ("shopping cart", {"shopping-cart": 2, "shopping-bag": 1}),
+    ],
+    "component": [
+        ("modal dialog", {"Dialog": 2, "AlertDialog": 1, "Sheet": 1, "Drawer": 1}),
+        ("dropdown select", {"Select": 2, "DropdownMenu": 2, "NativeSelect": 1, "Combobox": 1}),
+        ("notification toast", {"Toast": 2, "Sonner": 2, "Alert": 1}),
+        ("button", {"Button": 2, "ButtonGroup": 1, "CopyButton": 1}),
+    ],
+    "animation": [
+        ("fade in", {"Fade In": 2, "Blur In": 1, "Page Fade": 1}),
+        ("loading spinner", {"Spin": 2, "Pulse": 1, "Skeleton Shimmer": 1}),
+    ],
+    "effect": [
+        ("card hover", {"Card Hover Shadow": 2, "Card Hover Border": 2, "Card Hover Lift": 2}),
+        ("input focus", {"Input Focus Ring": 2, "Input Focus Border": 2, "Focus Within Highlight": 1}),
+        ('"hover shadow"', {"Card Hover Shadow": 2, "Card Hover Lift": 2}),
+    ],
+    "pattern": [
+        ("command palette keyboard", {"Command Palette": 2, "Search Navigation": 1}),
+        ("mobile bottom tabs", {"Tab Bar Navigation": 2, "Navigation Rail": 1}),
+    ],
+    "platform": [
+        ("touch targets", {"Optimize touch targets": 2, "Support touch gestures": 1}),
+        ("reduced motion", {"Respect reduced motion": 2, "Respect user preferences": 1}),
+    ],
+}
+
+EVAL_STACK_QUERIES = {
+    "html-tailwind": [
+        ("dark mode", {"Dark mode": 2, "Semantic colors": 1, "Theme color variables": 1}),
+        ("responsive images", {"Responsive images": 2, "Object fit": 1, "Lazy loading": 1, "Aspect ratio": 1}),
+    ],
+    "react": [
+        ("state management", {"Use useState for local state": 2, "Use useReducer for complex state": 2, "Lift state up when needed": 1, "Avoid unnecessary state": 1}),
+        ("memoization", {"Memoize expensive calculations": 2, "Memoize callbacks passed to children": 2, "Use React.memo wisely": 1}),
+    ],
+    "nextjs": [
+        ("image optimization", {"Use next/image for optimization": 2, "Provide width and height": 1, "Use priority for LCP images": 1, "Use fill for responsive images": 1}),
+        ("server components", {"Use Server Components by default": 2, "Mark Client Components explicitly": 1, "Fetch data in Server Components": 1}),
+    ],
+    "vue": [
+        ("reactive state", {"Use ref for primitives": 2, "Use reactive for objects": 2, "Use computed for derived state": 1}),
+        ("props", {"Define props with defineProps": 2, "Use withDefaults for default values": 1, "Avoid mutating props": 1}),
+    ],
+    "nuxtjs": [
+        ("data fetching", {"Use useFetch for simple data fetching": 2, "Use useAsyncData for complex fetching": 2, "Use $fetch for non-reactive requests": 1}),
+        ("seo meta tags", {"Use useSeoMeta for SEO tags": 2, "Use useHead for non-meta head elements": 1, "Include OpenGraph tags": 1}),
+    ],
+    "nuxt-ui": [
+        ("form validation", {"Use UForm with schema validation": 2, "Use UFormField for field wrapper": 1, "Use validateOn prop for validation timing": 1}),
+        ("toast notifications", {"Use useToast for notifications": 2, "Use UAlert for inline messages": 1}),
+    ],
+    "svelte": [
+        ("reactivity runes", {"Use $state in Svelte 5": 2, "Use $derived for computed values": 2, "Use $effect for side effects": 1}),
+        ("stores", {"Use writable for mutable state": 2, "Use readable for read-only state": 1, "Use derived for computed stores": 1}),
+    ],
+    "swiftui": [
+        ("state binding", {"Use @State for local state": 2, "Use @Binding for two-way data": 2, "Use @Bindable for @Observable": 1}),
+        ("navigation", {"Use NavigationStack (iOS 16+)": 2, "Use navigationDestination": 1}),
+    ],
+    "react-native": [
+        ("long list performance", {"Use FlatList for long lists": 2, "Optimize renderItem": 1, "Use getItemLayout for fixed height": 1, "Provide keyExtractor": 1}),
+        ("accessibility", {"Add accessibility labels": 2, "Use accessibility roles": 2, "Support screen readers": 1}),
+    ],
+    "flutter": [
+        ("list performance", {"Use ListView.builder": 2, "Provide itemExtent when known": 1, "Use const widgets": 1}),
+        ("theme dark mode", {"Support dark mode": 2, "Use ThemeData": 2, "Use ColorScheme": 1}),
+    ],
+    "shadcn": [
+        ("forms", {"Use Form with react-hook-form": 2, "Use FormField for inputs": 2, "Use Zod for validation": 1, "Display form messages": 1}),
+        ("modal dialog", {"Use Dialog for modal content": 2, "Use AlertDialog for confirms": 1, "Handle dialog state properly": 1}),
+    ],
+    "electron": [
+        ("ipc security", {"Use contextBridge for security": 2, "Validate IPC channels": 2, "Enable context isolation": 1}),
+        ("auto update", {"Implement auto-updates": 2, "Handle update lifecycle properly": 1, "Verify update signatures": 1}),
+    ],
+}
+
+
+# ============ METRICS ============
+def _title_col(domain):
+    """Column whose value names a row in judgments"""
+    return SUGGEST_TITLE_COLS.get(domain, CSV_CONFIG[domain]["output_cols"][0])
+
+
+def dcg(gains):
+    return sum(g / log2(i + 2) for i, g in enumerate(gains))
+
+
+def ndcg_at_k(titles, labels, k):
+    """NDCG@k of a ranked title list; repeated titles only earn their grade once"""
+    seen, gains = set(), []
+    for title in titles[:k]:
+        gains.append(labels.get(title, 0) if title not in seen else 0)
+        seen.add(title)
+    ideal = dcg(sorted(labels.values(), reverse=True)[:k])
+    return dcg(gains) / ideal if ideal else 0.0
+
+
+def recall_at_k(titles, labels, k):
+    """Share of labeled titles retrieved in the top k"""
+    relevant = {t for t, g in labels.items() if g > 0}
+    return len(relevant & set(titles[:k])) / len(relevant) if relevant else 0.0
+
+
+# ============ RUNNER ============
+def load_queries(path):
+    """Labeled set from JSON: {"domains": {d: [[query, {title: grade}]]}, "stacks": {...}}"""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return data.get("domains", {}), data.get("stacks", {})
+
+
+def _cases(domains, stacks, only_domain=None, only_stack=None):
+    """(group, search kwargs, title column, query, labels) for every selected judgment"""
+    cases = []
+    if only_stack is None:
+        for domain, queries in domains.items():
+            if only_domain and domain != only_domain:
+                continue
+            cases += [(domain, {"domain": domain}, _title_col(domain), q, labels) for q, labels in queries]
+    if only_domain is None:
+        for stack, queries in stacks.items():
+            if only_stack and stack != only_stack:
+                continue
+            cases += [(f"stack:{stack}", {"stack": stack}, SUGGEST_TITLE_COLS["stack"], q, labels) for q, labels in queries]
+    return cases
+
+
+def evaluate(engine="bm25", k=DEFAULT_K, domains=None, stacks=None, only_domain=None, only_stack=None,
+             rounds=ROUNDS, kb=None):
+    """Score one engine over the labeled set; returns per-query, per-group and overall metrics"""
+    kb = kb or KnowledgeBase()
+    cases = _cases(EVAL_QUERIES if domains is None else domains, EVAL_STACK_QUERIES if stacks is None else stacks,
+                   only_domain, only_stack)
+
+    def run_case(target, query):
+        if "stack" in target:
+            return kb.search_stack(query, target["stack"], k, engine=engine)
+        return kb.search(query, target["domain"], k, engine=engine)
+
+    queries, latencies = [], []
+    for group, target, title_col, query, labels in cases:
+        result = run_case(target, query)  # Warm the index so latency is steady-state
+        if "error" in result:
+            queries.append({"group": group, "query": query, "error": result["error"]})
+            continue
+        samples = []
+        for _ in range(rounds):
+            started = time.perf_counter()
+            run_case(target, query)
+            samples.append((time.perf_counter() - started) * 1000)
+        latencies += samples
+        titles = [row.get(title_col, "") for row in result["results"]]
+        missing = sorted(t for t, g in labels.items() if g > 0 and t not in titles[:k])
+        queries.append({"group": group, "query": query, "ndcg": round(ndcg_at_k(titles, labels, k), 4),
+                        "recall": round(recall_at_k(titles, labels, k), 4),
+                        "latency_ms": round(sorted(samples)[len(samples) // 2], 4),
+                        "top": titles[:k], "missing": missing})
+
+    scored = [q for q in queries if "error" not in q]
+    groups = {}
+    for q in scored:
+        groups.setdefault(q["group"], []).append(q)
+
+    def mean(values):
+        return round(sum(values) / len(values), 4) if values else 0.0
+
+    return {
+        "engine": engine,
+        "k": k,
+        "queries": queries,
+        "groups": {g: {"n": len(qs), "ndcg": mean([q["ndcg"] for q in qs]), "recall": mean([q["recall"] for q in qs]),
+                       "latency_ms": mean([q["latency_ms"] for q in qs])} for g, qs in groups.items()},
+        "overall": {"n": len(scored), "errors": len(queries) - len(scored),
+                    "ndcg": mean([q["ndcg"] for q in scored]), "recall": mean([q["recall"] for q in scored]),
+                    "latency_ms": summarize(latencies) if latencies else None},
+    }
+
+
+def compare(baseline, candidate, tolerance=TOLERANCE):
+    """Accept the candidate when overall NDCG@k and recall@k are within tolerance of the baseline"""
+    drops = {m: round(baseline["overall"][m] - candidate["overall"][m], 4) for m in ("ndcg", "recall")}
+    base_latency = baseline["overall"]["latency_ms"]
+    cand_latency = candidate["overall"]["latency_ms"]
+    speedup = round(base_latency["p50"] / cand_latency["p50"], 2) if base_latency and cand_latency and cand_latency["p50"] else None
+    worse = [{"group": q["group"], "query": q["query"], "baseline": b["ndcg"], "candidate": q["ndcg"]}
+             for b, q in zip(baseline["queries"], candidate["queries"])
+             if "error" not in b and "error" not in q and q["ndcg"] < b["ndcg"] - tolerance]
+    return {
+        "baseline": baseline["engine"],
+        "candidate": candidate["engine"],
+        "tolerance": tolerance,
+        "drops": drops,
+        "speedup": speedup,
+        "worse_queries": worse,
+        "accepted": all(d <= tolerance for d in drops.values()),
+    }
+
+
+# ============ OUTPUT ============
+def format_report(report):
+    """Markdown table per group plus the weakest queries"""
+    overall = report["overall"]
+    latency = overall["latency_ms"]
+    lines = [f"## UI Pro Max Evaluation",
+             f"**Engine:** {report['engine']} | **k:** {report['k']} | **Queries:** {overall['n']}"
+             f"{' | **Errors:** ' + str(overall['errors']) if overall['errors'] else ''}",
+             f"**NDCG@{report['k']}:** {overall['ndcg']:.3f} | **Recall@{report['k']}:** {overall['recall']:.3f}"
+             + (f" | **Latency:** p50 {latency['p50']:.3f} ms, p95 {latency['p95']:.3f} ms" if latency else "") + "\n",
+             "| Group | Queries | NDCG | Recall | Latency (ms) |", "|---|---|---|---|---|"]
+    for group, g in report["groups"].items():
+        lines.append(f"| {group} | {g['n']} | {g['ndcg']:.3f} | {g['recall']:.3f} | {g['latency_ms']:.3f} |")
+    weakest = sorted((q for q in report["queries"] if "error" not in q), key=lambda q: q["ndcg"])[:5]
+    if weakest:
+        lines.append("\n**Weakest queries:**")
+        for q in weakest:
+            lines.append(f"- {q['group']} \"{q['query']}\": NDCG {q['ndcg']:.3f}"
+                         + (f", missing {', '.join(q['missing'])}" if q["missing"] else ""))
+    for q in report["queries"]:
+        if "error" in q:
+            lines.append(f"- {q['group']} \"{q['query']}\": {q['error']}")
+    return "\n".join(lines)
+
+
+def format_comparison(comparison):
+    verdict = "ACCEPTED" if comparison["accepted"] else "REJECTED"
+    lines = [f"## {comparison['candidate']} vs {comparison['baseline']}: {verdict}",
+             f"- NDCG drop: {comparison['drops']['ndcg']:+.4f} | Recall drop: {comparison['drops']['recall']:+.4f} "
+             f"(tolerance {comparison['tolerance']})"]
+    if comparison["speedup"] is not None:
+        lines.append(f"- Speedup (p50): {comparison['speedup']}x")
+    for q in comparison["worse_queries"]:
+        lines.append(f"- Worse: {q['group']} \"{q['query']}\" {q['baseline']:.3f} -> {q['candidate']:.3f}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UI Pro Max Relevance Evaluation")
+    parser.add_argument("--engine", choices=ENGINES, default="bm25", help="Engine to evaluate (default: bm25)")
+    parser.add_argument("--baseline-engine", choices=ENGINES, help="Also evaluate this engine and gate on relevance drops")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help=f"Allowed NDCG/recall drop vs the baseline (default: {TOLERANCE})")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help=f"Cutoff for NDCG@k and recall@k (default: {DEFAULT_K})")
+    parser.add_argument("--rounds", type=int, default=ROUNDS, help=f"Timed repeats per query (default: {ROUNDS})")
+    parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Only this domain")
+    parser.add_argument("--stack", "-s", choices=list(STACK_CONFIG.keys()), help="Only this stack")
+    parser.add_argument("--queries", help="Labeled query set as JSON instead of the built-in one")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    args = parser.parse_args()
+
+    domains = stacks = None
+    if args.queries:
+        try:
+            domains, stacks = load_queries(args.queries)
+        except (OSError, ValueError) as e:
+            print(f"Error: cannot read {args.queries}: {e}")
+            return 2
+
+    kwargs = dict(k=args.k, domains=domains, stacks=stacks, only_domain=args.domain, only_stack=args.stack, rounds=args.rounds)
+    report = evaluate(args.engine, **kwargs)
+    if not args.baseline_engine:
+        print(json.dumps(report, indent=2) if args.json else format_report(report))
+        return 0
+
+    baseline = evaluate(args.baseline_engine, **kwargs)
+    comparison = compare(baseline, report, args.tolerance)
+    if args.json:
+        print(json.dumps({"baseline": baseline, "candidate": report, "comparison": comparison}, indent=2))
+    else:
+        print(format_report(report) + "\n\n" + format_comparison(comparison))
+    return 0 if comparison["accepted"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
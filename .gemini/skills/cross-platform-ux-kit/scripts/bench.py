@@ -0,0 +1,407 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Bench - search benchmarks with a local history and regression report
+Usage: python bench.py run [--rounds 5] [--engine bm25|lsa|hybrid] [--label <name>] [--compare [<baseline>]]
+       python bench.py compare [<baseline>] [--against <run>] [--min-change 0.1]
+       python bench.py history [--limit 10]
+
+Runs are appended to CACHE_DIR/bench/history.jsonl (or --history PATH), tagged
+with the git revision and an environment fingerprint. A baseline is a git
+revision prefix, a label, or a negative index (-2 = the run before the latest);
+by default the previous run from the same environment.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import hashlib
+import platform
+import subprocess
+from math import sqrt
+from pathlib import Path
+
+from core import (
+    CACHE_DIR, CSV_CONFIG, ENGINES, STACK_CONFIG, _STACK_COLS,
+    KnowledgeBase
+)
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+HISTORY_FILE = CACHE_DIR / "bench" / "history.jsonl"
+BUILD_REPEAT = 5
+MIN_CHANGE = 0.10
+T_CRITICAL = 2.0  # |Welch t| above this counts as a real difference (~95%)
+NOISE_SIGMAS = 3  # Run-to-run spread of repeated baseline runs widens the threshold by this many CVs
+
+# Fixed query set so runs stay comparable across revisions
+BENCH_QUERIES = {
+    "style": ["glassmorphism dark mode", "minimal clean whitespace", "brutalism bold"],
+    "prompt": ["neumorphism soft shadow", "retro futurism"],
+    "color": ["fintech trust blue", "healthcare calm", "gaming neon"],
+    "chart": ["trend over time", "comparison categories", "funnel conversion"],
+    "landing": ["hero social proof", "pricing comparison", "waitlist launch"],
+    "product": ["saas dashboard analytics", "ecommerce fashion", "beauty spa wellness"],
+    "ux": ["loading state feedback", "touch target size", "form validation error"],
+    "typography": ["elegant serif luxury", "modern geometric sans"],
+    "icons": ["settings gear", "arrow navigation"],
+    "component": ["dialog modal", "dropdown menu select"],
+    "animation": ["page transition", "hover microinteraction"],
+    "effect": ["glass blur", "gradient glow"],
+    "pattern": ["pull to refresh", "empty state"],
+    "platform": ["safe area insets", "keyboard shortcuts"],
+}
+BENCH_STACK_QUERIES = ["state management", "accessibility labels", "image optimization"]
+
+# Metric name prefix -> True when higher is better
+_HIGHER_IS_BETTER = {"throughput": True}
+
+
+# ============ ENVIRONMENT ============
+def git_revision():
+    """Short HEAD revision (with a + suffix when the tree is dirty), or None outside a git checkout"""
+    cwd = Path(__file__).parent
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=cwd, capture_output=True,
+                             text=True, timeout=10).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--", "."], cwd=cwd, capture_output=True,
+                               text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return (rev + ("+" if dirty else "")) or None
+
+
+def environment():
+    """Interpreter/machine description and a short fingerprint of it"""
+    env = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpus": os.cpu_count(),
+    }
+    env["fingerprint"] = hashlib.sha1(json.dumps(env, sort_keys=True).encode()).hexdigest()[:12]
+    return env
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unsupported)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# ============ STATISTICS ============
+def _percentile(sorted_values, q):
+    """Linear-interpolated percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    pos = (len(sorted_values) - 1) * q
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+def summarize(samples):
+    """mean/stdev/n plus p50/p95/p99 of a sample list"""
+    values = sorted(samples)
+    n = len(values)
+    mean = sum(values) / n
+    stdev = sqrt(sum((v - mean) ** 2 for v in values) / (n - 1)) if n > 1 else 0.0
+    return {
+        "n": n,
+        "mean": round(mean, 4),
+        "stdev": round(stdev, 4),
+        "p50": round(_percentile(values, 0.5), 4),
+        "p95": round(_percentile(values, 0.95), 4),
+        "p99": round(_percentile(values, 0.99), 4),
+    }
+
+
+def welch_t(a, b):
+    """Welch's t statistic for two summaries (0 when either has no spread information)"""
+    if a["n"] < 2 or b["n"] < 2:
+        return 0.0
+    se = sqrt(a["stdev"] ** 2 / a["n"] + b["stdev"] ** 2 / b["n"])
+    if se == 0:
+        return float("inf") if a["mean"] != b["mean"] else 0.0
+    return (b["mean"] - a["mean"]) / se
+
+
+# ============ RUNNER ============
+def _build_times(engine):
+    """Milliseconds to load each domain and build its index from a cold KnowledgeBase"""
+    samples = {}
+    for repeat in range(BUILD_REPEAT + 1):
+        kb = KnowledgeBase()
+        sources = [(domain, config["file"], config["search_cols"]) for domain, config in CSV_CONFIG.items()]
+        sources += [(f"stack:{stack}", config["file"], _STACK_COLS["search_cols"]) for stack, config in STACK_CONFIG.items()]
+        for name, file, search_cols in sources:
+            started = time.perf_counter()
+            table = kb.table(file, search_cols)
+            if table is not None:
+                table.bm25()
+                if engine != "bm25":
+                    table.lsa()
+            if repeat:  # The first pass only warms the OS file cache
+                samples.setdefault(name, []).append((time.perf_counter() - started) * 1000)
+    stacks = [sum(values) for values in zip(*(v for k, v in samples.items() if k.startswith("stack:")))]
+    samples = {k: v for k, v in samples.items() if not k.startswith("stack:")}
+    samples["stacks"] = stacks
+    return samples
+
+
+def run(rounds=5, engine="bm25", label=None):
+    """Benchmark the core search entry points; returns one history record"""
+    started = time.perf_counter()
+    builds = _build_times(engine)
+
+    kb = KnowledgeBase()
+    calls = [(domain, kb.search, (query, domain, 3)) for domain, queries in BENCH_QUERIES.items() for query in queries]
+    calls += [("stack", kb.search_stack, (query, stack, 3)) for stack in STACK_CONFIG for query in BENCH_STACK_QUERIES]
+    calls += [("auto", kb.search, (query, None, 3)) for queries in BENCH_QUERIES.values() for query in queries[:1]]
+    for _, fn, args in calls:  # Warm every index once so rounds measure steady-state queries
+        fn(*args, engine=engine)
+
+    latencies, throughput = {}, []
+    for _ in range(rounds):
+        round_start = time.perf_counter()
+        for group, fn, args in calls:
+            t0 = time.perf_counter()
+            fn(*args, engine=engine)
+            latencies.setdefault(group, []).append((time.perf_counter() - t0) * 1000)
+        throughput.append(len(calls) / (time.perf_counter() - round_start))
+
+    metrics = {"throughput": summarize(throughput)}
+    metrics["query.all"] = summarize([v for values in latencies.values() for v in values])
+    for group, values in latencies.items():
+        metrics[f"query.{group}"] = summarize(values)
+    for name, values in builds.items():
+        metrics[f"build.{name}"] = summarize(values)
+    rss = peak_rss_mb()
+    if rss is not None:
+        metrics["rss_peak_mb"] = {"n": 1, "mean": rss, "stdev": 0.0}
+
+    return {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": git_revision(),
+        "label": label,
+        "config": {"engine": engine, "rounds": rounds, "queries": len(calls)},
+        "env": environment(),
+        "elapsed_s": round(time.perf_counter() - started, 2),
+        "metrics": metrics,
+    }
+
+
+# ============ HISTORY ============
+def load_history(path=HISTORY_FILE):
+    """All recorded runs, oldest first"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def append_history(record, path=HISTORY_FILE):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+def find_run(history, ref, before=None):
+    """Resolve a run reference: negative index, label, or git revision prefix (latest match wins)"""
+    candidates = history[:before] if before is not None else history
+    if ref is None:
+        return None
+    if ref.lstrip("-").isdigit():
+        index = int(ref)
+        return history[index] if -len(history) <= index < len(history) else None
+    for record in reversed(candidates):
+        if record.get("label") == ref or (record.get("revision") or "").startswith(ref):
+            return record
+    return None
+
+
+def default_baseline(history, current):
+    """Most recent earlier run from the same environment and config"""
+    position = history.index(current) if current in history else len(history)
+    for record in reversed(history[:position]):
+        if record["env"]["fingerprint"] == current["env"]["fingerprint"] and record["config"] == current["config"]:
+            return record
+    return None
+
+
+# ============ COMPARISON ============
+def _central(summary):
+    """Median when recorded (robust to stray slow samples), else mean"""
+    return summary.get("p50", summary["mean"])
+
+
+def run_noise(history, baseline, current=None):
+    """{metric: relative stdev} across repeated runs of the baseline's revision, env and config.
+
+    Only runs up to the baseline count, and never the current run: a slow
+    current run of the same (e.g. dirty) revision would otherwise widen the
+    noise estimate and hide its own regressions.
+    """
+    position = history.index(baseline) + 1 if baseline in history else len(history)
+    peers = [r for r in history[:position] if r != current and r.get("revision") == baseline.get("revision")
+             and r["env"]["fingerprint"] == baseline["env"]["fingerprint"] and r["config"] == baseline["config"]]
+    if len(peers) < 2:
+        return {}
+    noise = {}
+    for name in baseline["metrics"]:
+        values = [_central(r["metrics"][name]) for r in peers if name in r["metrics"]]
+        mean = sum(values) / len(values)
+        if len(values) > 1 and mean:
+            noise[name] = sqrt(sum((v - mean) ** 2 for v in values) / (len(values) - 1)) / mean
+    return noise
+
+
+def compare(baseline, current, min_change=MIN_CHANGE, history=None):
+    """Per-metric comparison of medians.
+
+    A change counts only if it is significant (Welch t over the samples) and
+    larger than min_change, widened to NOISE_SIGMAS x the run-to-run spread
+    when the history holds repeated runs of the baseline.
+    """
+    noise = run_noise(history or [], baseline, current)
+    rows = []
+    for name, cur in current["metrics"].items():
+        base = baseline["metrics"].get(name)
+        if base is None:
+            continue
+        higher_better = _HIGHER_IS_BETTER.get(name.split(".")[0], False)
+        change = (_central(cur) - _central(base)) / _central(base) if _central(base) else 0.0
+        threshold = max(min_change, NOISE_SIGMAS * noise.get(name, 0.0))
+        t = welch_t(base, cur)
+        significant = abs(t) > T_CRITICAL if base["n"] > 1 and cur["n"] > 1 else True
+        status = "same"
+        if significant and abs(change) >= threshold:
+            worse = change < 0 if higher_better else change > 0
+            status = "regressed" if worse else "improved"
+        rows.append({"metric": name, "baseline": _central(base), "current": _central(cur),
+                     "change": round(change, 4), "threshold": round(threshold, 4),
+                     "t": round(t, 2) if t not in (float("inf"), float("-inf")) else None,
+                     "status": status})
+    warnings = []
+    if baseline["env"]["fingerprint"] != current["env"]["fingerprint"]:
+        warnings.append("environments differ; numbers are not directly comparable")
+    if baseline["config"] != current["config"]:
+        warnings.append(f"configs differ: {baseline['config']} vs {current['config']}")
+    return {
+        "baseline": {k: baseline.get(k) for k in ("time", "revision", "label")},
+        "current": {k: current.get(k) for k in ("time", "revision", "label")},
+        "min_change": min_change,
+        "noise_runs": len(noise) > 0,
+        "warnings": warnings,
+        "regressions": sum(r["status"] == "regressed" for r in rows),
+        "rows": rows,
+    }
+
+
+def _describe(record):
+    return f"{record.get('revision') or '?'}{' (' + record['label'] + ')' if record.get('label') else ''} @ {record.get('time')}"
+
+
+def format_report(report):
+    """Markdown table, regressions first"""
+    order = {"regressed": 0, "improved": 1, "same": 2}
+    lines = [f"## UI Pro Max Benchmark Comparison",
+             f"**Baseline:** {_describe(report['baseline'])} | **Current:** {_describe(report['current'])}",
+             f"**Regressions:** {report['regressions']} | **Threshold:** >= {report['min_change']:.0%}"
+             f"{' (or run-to-run noise)' if report['noise_runs'] else ''} and |t| > {T_CRITICAL}\n"]
+    lines += [f"> {w}" for w in report["warnings"]]
+    lines += ["| Metric | Baseline | Current | Change | Threshold | t | Status |", "|---|---|---|---|---|---|---|"]
+    for row in sorted(report["rows"], key=lambda r: (order[r["status"]], r["metric"])):
+        lines.append(f"| {row['metric']} | {row['baseline']:.3f} | {row['current']:.3f} | {row['change']:+.1%} | "
+                     f"{row['threshold']:.0%} | {row['t'] if row['t'] is not None else '-'} | {row['status']} |")
+    return "\n".join(lines)
+
+
+def format_run(record):
+    """Headline numbers of one run"""
+    metrics = record["metrics"]
+    query = metrics["query.all"]
+    lines = [f"## UI Pro Max Benchmark",
+             f"**Revision:** {record.get('revision') or '?'} | **Engine:** {record['config']['engine']} | "
+             f"**Rounds:** {record['config']['rounds']} | **Env:** {record['env']['fingerprint']}\n",
+             f"- Query latency (ms): p50 {query['p50']:.3f} | p95 {query['p95']:.3f} | p99 {query['p99']:.3f}",
+             f"- Throughput: {metrics['throughput']['mean']:.0f} queries/s"]
+    if "rss_peak_mb" in metrics:
+        lines.append(f"- Peak RSS: {metrics['rss_peak_mb']['mean']} MB")
+    builds = [(k[6:], v["mean"]) for k, v in metrics.items() if k.startswith("build.")]
+    lines.append("- Index build (ms): " + ", ".join(f"{name} {ms:.1f}" for name, ms in builds))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="UI Pro Max Benchmarks")
+    parser.add_argument("--history", default=str(HISTORY_FILE), help=f"History file (default: {HISTORY_FILE})")
+    parser.add_argument("--json", action="store_true", help="Output as JSON")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_p = sub.add_parser("run", help="Run the benchmark and append it to the history")
+    run_p.add_argument("--rounds", type=int, default=5, help="Timed rounds over the query set (default: 5)")
+    run_p.add_argument("--engine", choices=ENGINES, default="bm25", help="Ranking engine (default: bm25)")
+    run_p.add_argument("--label", help="Name this run (usable as a baseline)")
+    run_p.add_argument("--compare", nargs="?", const="", metavar="BASELINE", help="Compare with a baseline afterwards")
+    run_p.add_argument("--min-change", type=float, default=MIN_CHANGE, help=f"Smallest relative change reported (default: {MIN_CHANGE})")
+
+    cmp_p = sub.add_parser("compare", help="Compare the latest (or --against) run with a baseline")
+    cmp_p.add_argument("baseline", nargs="?", help="Revision prefix, label or negative index (default: previous comparable run)")
+    cmp_p.add_argument("--against", help="Run to compare (default: latest)")
+    cmp_p.add_argument("--min-change", type=float, default=MIN_CHANGE, help=f"Smallest relative change reported (default: {MIN_CHANGE})")
+
+    hist_p = sub.add_parser("history", help="List recorded runs")
+    hist_p.add_argument("--limit", type=int, default=10, help="Most recent runs to show (default: 10)")
+
+    args = parser.parse_args()
+    history = load_history(args.history)
+
+    if args.command == "history":
+        rows = history[-args.limit:]
+        if args.json:
+            print(json.dumps(rows, indent=2))
+            return 0
+        for i, record in zip(range(-len(rows), 0), rows):
+            query = record["metrics"]["query.all"]
+            print(f"{i:>4}  {_describe(record)}  {record['config']['engine']}  "
+                  f"p50 {query['p50']:.3f} ms  {record['metrics']['throughput']['mean']:.0f} q/s")
+        return 0
+
+    if args.command == "run":
+        current = run(args.rounds, args.engine, args.label)
+        append_history(current, args.history)
+        history.append(current)
+        ref = args.compare
+        if ref is None:
+            print(json.dumps(current, indent=2) if args.json else format_run(current))
+            return 0
+    else:
+        current = find_run(history, args.against) if args.against else (history[-1] if history else None)
+        if current is None:
+            print("Error: no benchmark run found" + (f" for {args.against}" if args.against else ""))
+            return 2
+        ref = args.baseline
+
+    baseline = find_run(history, ref, history.index(current)) if ref else default_baseline(history, current)
+    if baseline is None or baseline is current:
+        print(f"Error: no baseline run found{' for ' + ref if ref else ''}")
+        return 2
+    report = compare(baseline, current, args.min_change, history)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 1 if report["regressions"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
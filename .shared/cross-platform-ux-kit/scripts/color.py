@@ -0,0 +1,523 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Color - nearest-palette search (OKLab) and WCAG contrast audits
+"""
+
+import re
+import json
+import heapq
+from array import array
+from itertools import islice
+from math import sqrt
+
+from core import (
+    CSV_CONFIG, DATA_DIR, INDEX_DIR, MAX_RESULTS, TOKEN_FILES,
+    _load_csv, _select_cols, _data_version
+)
+
+HEX_RE = re.compile(r'^#?([0-9a-fA-F]{3}|[0-9a-fA-F]{6})$')
+KD_LEAF_SIZE = 16
+KD_SPLIT_SAMPLE = 64  # Keys sampled per cell to pick its split value
+
+# Minimum contrast ratios: (level, large text) -> ratio
+WCAG_THRESHOLDS = {
+    ("AA", False): 4.5,
+    ("AA", True): 3.0,
+    ("AAA", False): 7.0,
+    ("AAA", True): 4.5,
+}
+
+# Semantic token groups whose `.foreground` sits on their `.default`
+_TOKEN_SURFACES = ["primary", "secondary", "accent", "destructive", "success", "warning", "info"]
+# colors.csv roles checked against each palette's Background
+_PALETTE_FOREGROUNDS = ["Text (Hex)", "Primary (Hex)", "CTA (Hex)"]
+
+
+# ============ COLOR CONVERSION ============
+def parse_hex(value):
+    """Parse '#2563EB', '2563eb' or '#abc' into an (r, g, b) tuple of 0-255 ints, or None"""
+    match = HEX_RE.match(str(value).strip())
+    if not match:
+        return None
+    digits = match.group(1)
+    if len(digits) == 3:
+        digits = "".join(ch * 2 for ch in digits)
+    value = int(digits, 16)
+    return value >> 16, value >> 8 & 0xFF, value & 0xFF
+
+
+def _linear(channel):
+    """sRGB 0-255 channel to linear light"""
+    c = channel / 255
+    return c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4
+
+
+_LINEAR = tuple(_linear(c) for c in range(256))
+
+
+def rgb_to_oklab(rgb):
+    """Convert an sRGB tuple to OKLab (L, a, b); Euclidean distance there tracks perceived difference"""
+    r, g, b = (_LINEAR[c] for c in rgb)
+    l = (0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b) ** (1 / 3)
+    m = (0.2119034982 * r + 0.6806995451 * g + 0.1073969566 * b) ** (1 / 3)
+    s = (0.0883024619 * r + 0.2817188376 * g + 0.6299787005 * b) ** (1 / 3)
+    return (
+        0.2104542553 * l + 0.7936177850 * m - 0.0040720468 * s,
+        1.9779984951 * l - 2.4285922050 * m + 0.4505937099 * s,
+        0.0259040371 * l + 0.7827717662 * m - 0.8086757660 * s,
+    )
+
+
+def hex_to_oklab(value):
+    """Parse a hex color straight to OKLab, or None when it is not a hex color"""
+    rgb = parse_hex(value)
+    return rgb_to_oklab(rgb) if rgb else None
+
+
+# ============ KD-TREE ============
+class KDTree:
+    """Static 3-D KD-tree over a point list, stored as one permuted index array.
+
+    Each cell splits at the median of a key sample, partitioning in linear
+    time instead of sorting, so building is O(n log n).
+    """
+
+    def __init__(self, points):
+        self.points = points
+        self.order = list(range(len(points)))
+        self.nodes = {}
+        if points:
+            self._build(0, len(points), 0, [array("d", axis) for axis in zip(*points)])
+
+    def _build(self, lo, hi, axis, coords):
+        if hi - lo <= KD_LEAF_SIZE:
+            return
+        key, ids = coords[axis], self.order[lo:hi]
+        sample = sorted(key[i] for i in ids[::max(1, len(ids) // KD_SPLIT_SAMPLE)])
+        split = sample[len(sample) // 2]
+        below = [i for i in ids if key[i] < split]
+        equal = [i for i in ids if key[i] == split]
+        take = max(0, len(ids) // 2 - len(below))  # Ties fill either side so both stay non-empty
+        self.order[lo:hi] = below + equal + [i for i in ids if key[i] > split]
+        mid = lo + len(below) + min(take, len(equal))
+        self.nodes[(lo, hi)] = (split, mid)
+        self._build(lo, mid, (axis + 1) % 3, coords)
+        self._build(mid, hi, (axis + 1) % 3, coords)
+
+    def nearest(self, point, k=1, accept=None):
+        """Return [(squared distance, point index)] for the k nearest accepted points, closest first"""
+        heap = []  # Max-heap of the best k as (-dist, idx)
+        px, py, pz = point
+        points, order = self.points, self.order
+
+        def visit(lo, hi, axis):
+            if hi - lo <= KD_LEAF_SIZE:
+                for i in order[lo:hi]:
+                    if accept is not None and not accept(i):
+                        continue
+                    qx, qy, qz = points[i]
+                    d = (px - qx) ** 2 + (py - qy) ** 2 + (pz - qz) ** 2
+                    if len(heap) < k:
+                        heapq.heappush(heap, (-d, i))
+                    elif d < -heap[0][0]:
+                        heapq.heapreplace(heap, (-d, i))
+                return
+            split, mid = self.nodes[(lo, hi)]
+            diff = point[axis] - split
+            near, far = ((lo, mid), (mid, hi)) if diff < 0 else ((mid, hi), (lo, mid))
+            visit(near[0], near[1], (axis + 1) % 3)
+            if len(heap) < k or diff * diff < -heap[0][0]:
+                visit(far[0], far[1], (axis + 1) % 3)
+
+        if points:
+            visit(0, len(points), 0)
+        return sorted((-d, i) for d, i in heap)
+
+    def iter_nearest(self, point):
+        """Yield (squared distance, point index) for every point, closest first.
+
+        Best-first over one heap of cells and points: a cell's key is the
+        squared distance to its region (per-axis offsets updated at each split),
+        so a point is yielded only once no unopened cell can hold a closer one.
+        Consumers that stop early pay for the cells they opened, not the tree.
+        """
+        points, order, nodes = self.points, self.order, self.nodes
+        px, py, pz = point
+        heap = [(0.0, 1, 0, len(points), 0, (0.0, 0.0, 0.0))] if points else []  # (key, is cell, ...)
+        while heap:
+            entry = heapq.heappop(heap)
+            if not entry[1]:
+                yield entry[0], entry[2]
+                continue
+            bound, _, lo, hi, axis, offsets = entry
+            if hi - lo <= KD_LEAF_SIZE:
+                for i in order[lo:hi]:
+                    qx, qy, qz = points[i]
+                    heapq.heappush(heap, ((px - qx) ** 2 + (py - qy) ** 2 + (pz - qz) ** 2, 0, i))
+                continue
+            split, mid = nodes[(lo, hi)]
+            diff = point[axis] - split
+            near, far = ((lo, mid), (mid, hi)) if diff < 0 else ((mid, hi), (lo, mid))
+            heapq.heappush(heap, (bound, 1, near[0], near[1], (axis + 1) % 3, offsets))
+            far_offsets = offsets[:axis] + (diff * diff,) + offsets[axis + 1:]
+            heapq.heappush(heap, (bound - offsets[axis] + diff * diff, 1, far[0], far[1], (axis + 1) % 3, far_offsets))
+
+
+# ============ PALETTE INDEX ============
+class PaletteIndex:
+    """OKLab points for every hex column of every palette row, with a KD-tree per role and overall.
+
+    `palettes` keeps each row's OKLab points as one tuple so scoring a
+    candidate palette needs no index lookups.
+    """
+
+    def __init__(self, rows, roles=None):
+        self.rows = rows
+        self.roles = roles or [col for col in (rows[0] if rows else {}) if col.endswith("(Hex)")]
+        self.points = []
+        self.owner = []  # point index -> (row index, role)
+        self.palettes = []  # row index -> (OKLab point, ...)
+        for row_idx, row in enumerate(rows):
+            members = []
+            for role in self.roles:
+                lab = hex_to_oklab(row.get(role, ""))
+                if lab:
+                    members.append(lab)
+                    self.points.append(lab)
+                    self.owner.append((row_idx, role))
+            self.palettes.append(tuple(members))
+        self.tree = KDTree(self.points)
+        self._role_trees = {}
+
+    def _role_tree(self, role):
+        """Per-role tree, built on first use; returns (tree, local index -> global point index)"""
+        if role not in self._role_trees:
+            ids = [i for i, (_, r) in enumerate(self.owner) if r == role]
+            self._role_trees[role] = (KDTree([self.points[i] for i in ids]), ids)
+        return self._role_trees[role]
+
+    def nearest(self, color, k=MAX_RESULTS, role=None):
+        """k palettes holding the closest color to `color`: [(row index, role, distance)]"""
+        lab = hex_to_oklab(color)
+        if lab is None:
+            raise ValueError(f"Not a hex color: {color}")
+
+        if role:
+            tree, ids = self._role_tree(role)
+            return [(self.owner[ids[i]][0], role, sqrt(d)) for d, i in tree.nearest(lab, k)]
+
+        return [(row_idx, hit_role, dist) for dist, row_idx, hit_role in islice(self._palette_stream(lab), k)]
+
+    def _palette_stream(self, lab):
+        """Yield (distance, row index, role) per palette in order of its closest color to `lab`"""
+        seen = set()
+        for d, i in self.tree.iter_nearest(lab):
+            row_idx, role = self.owner[i]
+            if row_idx not in seen:
+                seen.add(row_idx)
+                yield sqrt(d), row_idx, role
+
+    def closest_palettes(self, colors, k=MAX_RESULTS):
+        """k palettes minimizing the summed distance from each brand color to its closest palette color.
+
+        Each brand color streams palettes in order of their distance to it,
+        read round-robin (threshold algorithm): a palette is scored exactly the
+        first time any stream reaches it, and an unseen palette scores at least
+        the sum of the streams' current distances. Reading stops once the k-th
+        best score is within that bound, so the answer is exact while only the
+        palettes near some brand color are scored. The streams read about
+        k * sqrt(N) palettes for random brand colors, far fewer when one palette
+        is close to all of them.
+        """
+        labs = [hex_to_oklab(c) for c in colors]
+        if not labs or None in labs:
+            raise ValueError(f"Not a hex color list: {colors}")
+
+        streams = [self._palette_stream(lab) for lab in labs]
+        frontier = [0.0] * len(labs)
+        best, scored = [], set()  # Max-heap of the best k as (-score, -row index)
+        while True:
+            for j, stream in enumerate(streams):
+                hit = next(stream, None)
+                if hit is None:  # Every palette has been scored
+                    return [(-row_idx, None, -score) for score, row_idx in sorted(best, reverse=True)]
+                frontier[j], row_idx, _ = hit
+                if row_idx in scored:
+                    continue
+                scored.add(row_idx)
+                if len(best) < k:
+                    heapq.heappush(best, (-self._set_distance(labs, row_idx), -row_idx))
+                    continue
+                score = self._set_distance(labs, row_idx, -best[0][0])
+                if score is not None and (-score, -row_idx) > best[0]:
+                    heapq.heapreplace(best, (-score, -row_idx))
+            if len(best) == k and -best[0][0] <= sum(frontier):
+                return [(-row_idx, None, -score) for score, row_idx in sorted(best, reverse=True)]
+
+    def _set_distance(self, labs, row_idx, limit=None):
+        """Summed distance from each lab to the palette's closest color; None once it exceeds `limit`"""
+        points, total = self.palettes[row_idx], 0.0
+        for x, y, z in labs:
+            total += sqrt(min((x - a) ** 2 + (y - b) ** 2 + (z - c) ** 2 for a, b, c in points))
+            if limit is not None and total > limit:
+                return None
+        return total
+
+
+_PALETTE_INDEX = None
+
+
+def palette_index():
+    """Process-wide PaletteIndex over colors.csv, built on first use"""
+    global _PALETTE_INDEX
+    if _PALETTE_INDEX is None:
+        filepath = DATA_DIR / CSV_CONFIG["color"]["file"]
+        _PALETTE_INDEX = PaletteIndex(_load_csv(filepath) if filepath.exists() else [])
+    return _PALETTE_INDEX
+
+
+def search_colors(colors, max_results=MAX_RESULTS, role=None, fields=None):
+    """Find palettes near one color, or closest to a set of brand colors"""
+    if isinstance(colors, str):
+        colors = [c for c in re.split(r'[\s,]+', colors) if c]
+    config = CSV_CONFIG["color"]
+    index = palette_index()
+    if role:
+        role = next((r for r in index.roles if r.casefold() in (role.casefold(), f"{role} (hex)".casefold())), role)
+        if role not in index.roles:
+            return {"error": f"Unknown color role: {role}. Available: {', '.join(index.roles)}", "domain": "color"}
+
+    try:
+        cols = _select_cols(config["output_cols"], fields)
+        if len(colors) == 1:
+            hits = index.nearest(colors[0], max_results, role)
+        else:
+            hits = index.closest_palettes(colors, max_results)
+    except ValueError as e:
+        return {"error": str(e), "domain": "color"}
+
+    results = []
+    for row_idx, hit_role, dist in hits:
+        row = index.rows[row_idx]
+        result = {col: row.get(col, "") for col in cols if col in row}
+        if hit_role:
+            result["_matched"] = hit_role
+        result["_distance"] = round(dist * 100, 2)
+        results.append(result)
+
+    return {
+        "domain": "color",
+        "query": ", ".join(colors),
+        "file": config["file"],
+        "role": role,
+        "count": len(results),
+        "results": results
+    }
+
+
+# ============ CONTRAST ============
+def relative_luminance(rgb):
+    """WCAG 2.x relative luminance of an sRGB tuple"""
+    r, g, b = (_LINEAR[c] for c in rgb)
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+
+def contrast_ratio(foreground, background):
+    """WCAG contrast ratio between two hex colors (1.0 - 21.0)"""
+    la, lb = (relative_luminance(parse_hex(c)) for c in (foreground, background))
+    return (max(la, lb) + 0.05) / (min(la, lb) + 0.05)
+
+
+def _token_colors(data):
+    """Hex colors from color.json as entries; `.light`/`.dark` leaves set the mode"""
+    entries = []
+
+    def walk(obj, path):
+        for key, value in obj.items():
+            name = f"{path}.{key}" if path else key
+            if isinstance(value, dict):
+                walk(value, name)
+            elif parse_hex(value):
+                mode = key if key in ("light", "dark") else None
+                entries.append({"name": name.rsplit(".", 1)[0] if mode else name, "hex": value.upper(),
+                                "mode": mode, "group": "tokens"})
+
+    walk(data, "")
+    return entries
+
+
+def _token_pairs(entries):
+    """Designated (foreground, background) name pairs among semantic tokens"""
+    names = {e["name"] for e in entries}
+    pairs = []
+    for fg in sorted(n for n in names if n.startswith("semantic.foreground.")):
+        variant = fg.rsplit(".", 1)[1]
+        surfaces = ["inverse"] if variant == "inverse" else ["default", "muted", "subtle"]
+        pairs.extend((fg, f"semantic.background.{bg}") for bg in surfaces if f"semantic.background.{bg}" in names)
+    for group in _TOKEN_SURFACES:
+        fg, bg = f"semantic.{group}.foreground", f"semantic.{group}.default"
+        if fg in names and bg in names:
+            pairs.append((fg, bg))
+    return pairs
+
+
+class ContrastMatrix:
+    """Relative luminances for every token and palette color, and the full pairwise contrast matrix"""
+
+    def __init__(self, entries, pairs, matrix=None):
+        self.entries = entries
+        self.pairs = pairs
+        self.lum = [relative_luminance(parse_hex(e["hex"])) for e in entries]
+        self.n = len(entries)
+        self.matrix = matrix if matrix is not None else self._compute()
+        self._by_key = {(e["name"], e["mode"]): i for i, e in enumerate(entries)}
+
+    def _compute(self):
+        """Fill the N x N ratio matrix row by row, each row in one comprehension over the luminance array"""
+        lum = [l + 0.05 for l in self.lum]
+        matrix = array("f")
+        for a in lum:
+            matrix.extend([a / b if a > b else b / a for b in lum])
+        return matrix
+
+    @classmethod
+    def from_data(cls):
+        """Build from color.json and colors.csv"""
+        entries, pairs = [], []
+        token_path = DATA_DIR / TOKEN_FILES["color"]
+        if token_path.exists():
+            with token_path.open('r', encoding='utf-8') as f:
+                tokens = _token_colors(json.load(f))
+            entries.extend(tokens)
+            for fg, bg in _token_pairs(tokens):
+                pairs.extend([fg, bg, mode] for mode in ("light", "dark"))
+
+        csv_path = DATA_DIR / CSV_CONFIG["color"]["file"]
+        for row in (_load_csv(csv_path) if csv_path.exists() else []):
+            background = parse_hex(row.get("Background (Hex)", ""))
+            if not background:
+                continue
+            mode = "dark" if relative_luminance(background) < 0.18 else "light"
+            product = row.get("Product Type", "")
+            for role in ["Background (Hex)"] + _PALETTE_FOREGROUNDS:
+                if parse_hex(row.get(role, "")):
+                    entries.append({"name": f"{product} / {role[:-6]}", "hex": row[role].upper(),
+                                    "mode": mode, "group": product})
+            pairs.extend([f"{product} / {role[:-6]}", f"{product} / Background", mode]
+                         for role in _PALETTE_FOREGROUNDS if parse_hex(row.get(role, "")))
+        return cls(entries, pairs)
+
+    def ratio(self, i, j):
+        return self.matrix[i * self.n + j]
+
+    def _index(self, name, mode):
+        return self._by_key.get((name, mode), self._by_key.get((name, None)))
+
+    def failing(self, level="AA", mode=None, large_text=False, scope="pairs", query=None):
+        """Foreground/background pairs below the WCAG threshold.
+
+        scope="pairs" checks designated pairs (token X.foreground on X.default,
+        palette Text/Primary/CTA on Background); scope="all" checks every
+        foreground-role color against every background-role color of the same
+        mode and group (the token set, or one palette).
+        """
+        threshold = WCAG_THRESHOLDS[(level.upper(), large_text)]
+        needle = query.casefold() if query else None
+        if scope == "all":
+            fgs = [i for i, e in enumerate(self.entries) if _is_foreground(e)]
+            bgs = [i for i, e in enumerate(self.entries) if _is_background(e)]
+            candidates = [(i, j) for i in fgs for j in bgs
+                          if self.entries[i]["group"] == self.entries[j]["group"]
+                          and self.entries[i]["mode"] == self.entries[j]["mode"]]
+        else:
+            candidates = [(self._index(fg, m), self._index(bg, m)) for fg, bg, m in self.pairs]
+
+        failures = []
+        for i, j in candidates:
+            if i is None or j is None:
+                continue
+            fg, bg = self.entries[i], self.entries[j]
+            pair_mode = fg["mode"] or bg["mode"]
+            if mode and pair_mode != mode:
+                continue
+            if needle and needle not in fg["name"].casefold() and needle not in bg["name"].casefold():
+                continue
+            value = self.ratio(i, j)
+            if value < threshold:
+                failures.append({"foreground": fg["name"], "foreground_hex": fg["hex"],
+                                 "background": bg["name"], "background_hex": bg["hex"],
+                                 "mode": pair_mode, "ratio": round(value, 2), "required": threshold})
+        return sorted(failures, key=lambda f: f["ratio"])
+
+    def save(self, path):
+        """Write entries as JSON and the matrix as raw float32, replacing older data versions"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        for stale in path.parent.iterdir():
+            if stale.stem != path.name:
+                stale.unlink(missing_ok=True)
+        with open(path.with_suffix(".json"), 'w', encoding='utf-8') as f:
+            json.dump({"entries": self.entries, "pairs": self.pairs}, f, ensure_ascii=False)
+        with open(path.with_suffix(".bin"), 'wb') as f:
+            self.matrix.tofile(f)
+
+    @classmethod
+    def load(cls, path):
+        with open(path.with_suffix(".json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        matrix = array("f")
+        with open(path.with_suffix(".bin"), 'rb') as f:
+            matrix.frombytes(f.read())
+        if len(matrix) != len(meta["entries"]) ** 2:
+            raise ValueError("Contrast matrix cache is truncated")
+        return cls(meta["entries"], meta["pairs"], matrix)
+
+
+def _is_foreground(entry):
+    name = entry["name"]
+    return ".foreground" in name or name.endswith(tuple(f"/ {r[:-6]}" for r in _PALETTE_FOREGROUNDS))
+
+
+def _is_background(entry):
+    name = entry["name"]
+    return (name.startswith("semantic.background.") or name.endswith("/ Background")
+            or name in {f"semantic.{g}.default" for g in _TOKEN_SURFACES})
+
+
+_CONTRAST = {}
+
+
+def contrast_matrix():
+    """ContrastMatrix for the current data version, memoized in-process and cached under INDEX_DIR"""
+    version = _data_version([TOKEN_FILES["color"], CSV_CONFIG["color"]["file"]])
+    if version not in _CONTRAST:
+        path = INDEX_DIR / "contrast" / version
+        try:
+            matrix = ContrastMatrix.load(path)
+        except (OSError, ValueError, KeyError):
+            matrix = ContrastMatrix.from_data()
+            try:
+                matrix.save(path)
+            except OSError:
+                pass
+        _CONTRAST.clear()
+        _CONTRAST[version] = matrix
+    return _CONTRAST[version]
+
+
+def audit_contrast(query=None, level="AA", mode=None, large_text=False, scope="pairs", max_results=None):
+    """List color pairs failing WCAG contrast, worst first"""
+    if (level.upper(), large_text) not in WCAG_THRESHOLDS:
+        return {"error": f"Unknown WCAG level: {level}. Available: AA, AAA", "domain": "contrast"}
+    failures = contrast_matrix().failing(level, mode, large_text, scope, query)
+    results = failures[:max_results] if max_results else failures
+    return {
+        "domain": "contrast",
+        "query": query or "",
+        "level": level.upper() + (" large" if large_text else ""),
+        "mode": mode or "all",
+        "scope": scope,
+        "count": len(results),
+        "total": len(failures),
+        "results": results
+    }
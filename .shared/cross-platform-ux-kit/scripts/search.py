@@ -2,7 +2,18 @@
 # -*- coding: utf-8 -*-
 """
 UI/UX Pro Max Search - BM25 search engine for UI/UX style guides
-Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>] [--max-results 3]
+Usage: python search.py "<query>" [--domain <domain>] [--stack <stack>[,<stack>...]] [--max-results 3] [--engine bm25|lsa|hybrid] [--explain] [--full | --highlight]
+       python search.py --cursor <cursor> [--max-results 3] [--fields "Col A,Col B"]
+       python search.py "#2563EB[,#F97316...]" --near [--role Primary]
+       python search.py ["<name filter>"] --contrast [--level AA|AAA] [--mode light|dark] [--large-text] [--all-pairs]
+       python search.py "<prefix>" --suggest [--domain <domain> | --stack <stack>[,<stack>...] | --token <token>]
+       python search.py "<product query>" --recommend [--stack <stack>]
+       python search.py "<query>" --compare [--max-results 3]
+       python search.py --build-tokens [--out design-tokens] [--target css,tailwind,swift,dart]
+       python search.py ["<query>"] --facets [--domain <domain> | --stack <stack>] [--where ...]
+       python search.py --where "Column=Value" [--domain <domain> | --stack <stack>]   (no query: matching rows in table order)
+       [--where "Column=Value[,Value]" ...]
+       [--json | --jsonl | --compact [--budget 2000] [--budget-unit chars|tokens]] [--fields "Col A,Col B"]
 
 Domains: style, prompt, color, chart, landing, product, ux, typography, icons, component, animation, effect, pattern, platform
 Stacks: html-tailwind, react, nextjs, vue, svelte, swiftui, react-native, flutter, shadcn, electron
@@ -11,11 +22,51 @@ Platforms: web, electron, swiftui, react-native, flutter
 """
 
 import argparse
+import json
+import sys
 from core import (
-    CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS,
-    search, search_stack, search_pattern, search_platform, search_tokens,
+    CSV_CONFIG, AVAILABLE_STACKS, MAX_RESULTS, ENGINES,
+    search, search_stack, search_pattern, search_platform, search_tokens, next_page, save_cursor, facets, suggest, recommend, compare,
+    SUGGEST_LIMIT,
     AVAILABLE_PLATFORMS, AVAILABLE_TOKENS
 )
+from color import search_colors, audit_contrast
+from tokens import build_tokens, TOKEN_TARGETS
+
+# Matched search-column values are shown as a window of this many characters around the matches
+SNIPPET_WIDTH = 160
+HIGHLIGHT = ("**", "**")
+
+
+def snippet(text, spans, width=SNIPPET_WIDTH, marks=HIGHLIGHT):
+    """Window of text around its densest cluster of matched [start, end] spans, matches wrapped in marks"""
+    text = str(text)
+    lo, hi = 0, len(text)
+    if len(text) > width:
+        best, first_i, j = 0, 0, 0
+        for i, (start, _) in enumerate(spans):
+            j = max(j, i + 1)
+            while j < len(spans) and spans[j][1] <= start + width:
+                j += 1
+            if j - i > best:
+                best, first_i = j - i, i
+        first, last = spans[first_i][0], spans[first_i + best - 1][1]
+        lo = max(0, min(first - (width - (last - first)) // 2, len(text) - width))
+        hi = min(len(text), lo + width)
+        if lo > 0:  # Snap to word boundaries without cutting into a match
+            space = text.find(" ", lo, first)
+            lo = space + 1 if space != -1 else lo
+        if hi < len(text):
+            space = text.rfind(" ", last, hi)
+            hi = space if space != -1 else hi
+
+    parts, pos = [], lo
+    for start, end in spans:
+        if start >= pos and end <= hi:
+            parts += [text[pos:start], marks[0], text[start:end], marks[1]]
+            pos = end
+    parts.append(text[pos:hi])
+    return ("..." if lo > 0 else "") + "".join(parts) + ("..." if hi < len(text) else "")
 
 
 def format_output(result):
@@ -37,6 +88,10 @@ def format_output(result):
     elif domain == "pattern":
         output.append(f"## UI Pro Max Cross-Platform Patterns")
         output.append(f"**Query:** {result['query']} | **Found:** {result['count']} results\n")
+    elif domain == "contrast":
+        output.append(f"## UI Pro Max Contrast Audit")
+        output.append(f"**Level:** WCAG {result['level']} | **Mode:** {result['mode']} | **Scope:** {result['scope']}")
+        output.append(f"**Failing:** {result['total']} pairs (showing {result['count']})\n")
     elif domain == "platform":
         output.append(f"## UI Pro Max Platform Guidelines")
         platform = result.get('platform', 'all')
@@ -47,47 +102,432 @@ def format_output(result):
         output.append(f"**Domain:** {domain} | **Query:** {result['query']}")
         output.append(f"**Source:** {result.get('file', 'N/A')} | **Found:** {result['count']} results\n")
 
-    for i, row in enumerate(result['results'], 1):
-        output.append(f"### Result {i}")
+    for i, row in enumerate(result['results'], result.get("offset", 0) + 1):
+        output.append(f"### Result {i} ({row['_stack']})" if "_stack" in row else f"### Result {i}")
+        matches = row.get("_matches", {})
         for key, value in row.items():
             if key.startswith("_"):
                 continue  # Skip internal keys
             value_str = str(value)
-            if len(value_str) > 500:
+            if key in matches:
+                value_str = snippet(value_str, matches[key])
+            elif len(value_str) > 500:
                 value_str = value_str[:500] + "..."
             output.append(f"- **{key}:** {value_str}")
+        if "_explain" in row:
+            output.append(f"- _Explain:_ {format_explain(row['_explain'])}")
         output.append("")
 
+    if result.get("cursor"):
+        output.append(f"**More results:** `--cursor {result['cursor']}`")
+
+    return "\n".join(output)
+
+
+def format_explain(info):
+    """One-line score breakdown: total, per-term tf x idf -> contribution, matched columns"""
+    parts = [f"score {info['score']}"]
+    if "bm25" in info:
+        parts[0] += f" ({info['engine']}, bm25 {info['bm25']})"
+    terms = info.get("terms")
+    if terms:
+        parts.append("; ".join(f"{t['term']}: tf {t['tf']} x idf {t['idf']} -> {t['contribution']}" for t in terms))
+    parts.append("matched: " + (", ".join(info["matched_cols"]) or "-"))
+    return " | ".join(parts)
+
+
+def format_suggest(result):
+    """Format completions as one compact line each"""
+    if "error" in result:
+        return f"Error: {result['error']}"
+    lines = [f"## UI Pro Max Suggestions",
+             f"**Prefix:** {result['query']} | **Scope:** {result['scope']} | **Found:** {result['count']}\n"]
+    for r in result["results"]:
+        lines.append(f"- {r['text']} ({r['kind']}, {', '.join(r['domains'])})")
+    return "\n".join(lines)
+
+
+def format_facets(result):
+    """Format facet counts as one line per column"""
+    if "error" in result:
+        return f"Error: {result['error']}"
+
+    scope = result.get("stack") or result["domain"]
+    output = [f"## UI Pro Max Facets",
+              f"**Domain:** {scope} | **Query:** {result.get('query') or '(all rows)'}",
+              f"**Source:** {result['file']} | **Rows:** {result['total']}\n"]
+    for col, values in result["facets"].items():
+        output.append(f"- **{col}:** " + ", ".join(f"{v['value']} ({v['count']})" for v in values))
     return "\n".join(output)
 
 
+def format_build(result):
+    """Format a token build summary"""
+    if "error" in result:
+        return f"Error: {result['error']}"
+
+    fragments = result["fragments"]
+    lines = [f"## UI Pro Max Token Build",
+             f"**Output:** {result['out_dir']} | **Fragments:** {fragments['built']} built, "
+             f"{fragments['cached']} cached | **Time:** {result['elapsed_ms']} ms\n"]
+    for target, output in result["outputs"].items():
+        lines.append(f"- {target}: {output['file']} ({'written' if output['changed'] else 'unchanged'})")
+    return "\n".join(lines)
+
+
+def format_recommend(result, budget=None):
+    """Format each pipeline section in turn (compact when a budget is given, split evenly across sections)"""
+    if "error" in result:
+        return f"Error: {result['error']}"
+
+    output = [f"# UI Pro Max Recommendation",
+              f"**Query:** {result['query']} | **Product:** {result.get('product') or '(no match)'} | "
+              f"**Stack:** {result['stack']} | **Time:** {result['elapsed_ms']} ms\n"]
+    sections = list(result["sections"].values())
+    if budget:
+        budget = max(0, budget - len("\n\n".join(output)) - 2 * len(sections)) // len(sections)
+    for section in sections:
+        output.append(format_compact(section, budget) if budget else format_output(section))
+    return "\n\n".join(output)
+
+
+# Characters kept per cell of the compare matrix
+COMPARE_CELL_WIDTH = 90
+
+
+def _cell(text, width=COMPARE_CELL_WIDTH):
+    """One markdown table cell: single line, pipes escaped, cut at width"""
+    text = " ".join(str(text).split()).replace("|", "\\|")
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def format_compare(result):
+    """Format the cross-platform matrix as one markdown table for patterns and one for guidelines"""
+    if "error" in result:
+        return f"Error: {result['error']}"
+
+    platforms = result["platforms"]
+    header = " | ".join(platforms)
+    output = [f"## UI Pro Max Cross-Platform Comparison",
+              f"**Query:** {result['query']} | **Platforms:** {', '.join(platforms)}\n"]
+    if result["patterns"]:
+        output += ["### Patterns", f"| Pattern | {header} |", "|" + " --- |" * (len(platforms) + 1)]
+        for row in result["patterns"]:
+            cells = [_cell(row["platforms"].get(p, "-")) for p in platforms]
+            output.append(f"| **{_cell(row['Pattern'])}** | " + " | ".join(cells) + " |")
+        output.append("")
+    output += ["### Guidelines", f"| Category | {header} |", "|" + " --- |" * (len(platforms) + 1)]
+    for row in result["guidelines"]:
+        cells = []
+        for p in platforms:
+            cell = row["platforms"].get(p)
+            cells.append(_cell(f"{cell['Guideline']}: {cell['Do']}") if cell else "-")
+        output.append(f"| **{_cell(row['Category'])}** | " + " | ".join(cells) + " |")
+    if not result["guidelines"]:
+        output.append("| (no matching guidelines) |" + " |" * len(platforms))
+    return "\n".join(output)
+
+
+# Columns dropped first (in order) when a compact result exceeds its budget
+COMPACT_DROP_ORDER = {
+    "style": ["Framework Compatibility", "Performance", "Complexity", "Keywords", "Accessibility", "Effects & Animation"],
+    "prompt": ["Implementation Checklist", "CSS/Technical Keywords"],
+    "color": ["Keywords", "Notes", "Border (Hex)"],
+    "chart": ["Keywords", "Interactive Level", "Secondary Options", "Library Recommendation", "Color Guidance"],
+    "landing": ["Keywords", "Conversion Optimization", "Color Strategy"],
+    "product": ["Keywords", "Dashboard Style (if applicable)", "Secondary Styles", "Color Palette Focus"],
+    "ux": ["Code Example Bad", "Code Example Good", "Platform", "Category", "Description"],
+    "typography": ["Tailwind Config", "CSS Import", "Notes", "Google Fonts URL", "Mood/Style Keywords"],
+    "icons": ["Keywords", "Style", "Best For", "Usage"],
+    "component": ["Docs URL", "Code Example", "Composition", "Animation", "Common Mistakes"],
+    "animation": ["Framer Motion", "Performance", "Use Cases", "Easing"],
+    "effect": ["Example", "Props", "Notes", "Duration"],
+    "pattern": ["Trigger", "Accessibility"],
+    "platform": ["Platform Notes", "Category", "Description"],
+    "stack": ["Docs URL", "Code Bad", "Code Good", "Category", "Description"],
+}
+
+CHARS_PER_TOKEN = 4
+COMPACT_MIN_VALUE = 24  # Values are not cut below this many characters; fields are dropped instead
+
+
+def _truncate(value, cap):
+    """Cut value to at most cap characters ending in an ellipsis, never inside a ** marker and with emphasis closed"""
+    if len(value) <= cap:
+        return value
+    end = cap - 1
+    while end > 0:
+        head = value[:end]
+        if head.endswith("*") and value[end] == "*":
+            end -= 1  # Would split a marker
+        elif head.count("**") % 2 == 0:
+            return head + "…"
+        elif head.endswith("**"):
+            end -= 2  # Would open an empty emphasis
+        elif end + 3 <= cap:
+            return head + "**…"
+        else:
+            end -= 1
+    return "…"
+
+
+def _fit_values(fields, limit):
+    """Render fields in at most limit characters: shorten the longest values down to COMPACT_MIN_VALUE,
+    then drop trailing fields; None when not even one field fits"""
+    def render(fields, cap):
+        return "; ".join(f"{k}: {_truncate(v, cap)}" for k, v in fields)
+
+    while fields:
+        longest = max(len(v) for _, v in fields)
+        line = render(fields, longest)
+        if len(line) <= limit:
+            return line
+        lo, hi = min(COMPACT_MIN_VALUE, longest), longest
+        if len(render(fields, lo)) <= limit:
+            while lo < hi:
+                mid = (lo + hi + 1) // 2
+                if len(render(fields, mid)) <= limit:
+                    lo = mid
+                else:
+                    hi = mid - 1
+            return render(fields, lo)
+        fields = fields[:-1]
+    return None
+
+
+def format_compact(result, budget=2000):
+    """Render results within a character budget for LLM consumers.
+
+    Every emitted character counts, newlines and the header and cursor lines
+    included. The budget is split across results by rank (1/rank weights,
+    unused share rolls over), low-value columns are dropped first per
+    COMPACT_DROP_ORDER, values are shortened down to COMPACT_MIN_VALUE, then
+    whole fields and finally whole results are dropped. Values already shown
+    in an earlier result (not an earlier field of the same one) are replaced
+    by `=N`.
+    """
+    if "error" in result:
+        return f"Error: {result['error']}"[:budget]
+
+    domain = result.get("domain", "unknown")
+    scope = result.get("stack") or result.get("platform") or result.get("token_type") or domain
+    rows = result["results"]
+    output = [f"{scope} | {result['query']} | {result['count']} results"[:budget]]
+    footer = f"cursor: {result['cursor']}" if result.get("cursor") else None
+    remaining = budget - len(output[0])
+    if footer and len(footer) + 1 <= remaining:
+        remaining -= len(footer) + 1
+    else:
+        footer = None
+
+    drop_order = COMPACT_DROP_ORDER.get("stack" if result.get("stack") else domain, [])
+    start = result.get("offset", 0)
+    weights = [1 / rank for rank in range(1, len(rows) + 1)]
+    seen = {}
+    left_out = 0
+
+    for i, row in enumerate(rows):
+        share = int(remaining * weights[i] / sum(weights[i:]))
+        prefix = f"{start + i + 1}. "
+        tags = [str(v) for k, v in row.items() if k.startswith("_") and k not in ("_explain", "_matches")]
+        if tags:
+            prefix += f"[{','.join(tags)}] "
+        if "_explain" in row:
+            prefix += f"(score {row['_explain']['score']}) "
+
+        fields = []
+        matches = row.get("_matches", {})
+        for key, value in row.items():
+            if key.startswith("_"):
+                continue
+            if key in matches:
+                value = snippet(value, matches[key])
+            value = " ".join(str(value).split())
+            if not value:
+                continue
+            fields.append((key, f"={seen[value]}" if len(value) > 12 and value in seen else value))
+        for _, value in fields:
+            seen.setdefault(value, start + i + 1)
+
+        limit = share - len(prefix) - 1  # The line's own newline
+        for col in drop_order:
+            if len("; ".join(f"{k}: {v}" for k, v in fields)) <= limit or len(fields) <= 1:
+                break
+            fields = [(k, v) for k, v in fields if k != col]
+
+        body = _fit_values(fields, limit)
+        if body is None:
+            left_out = len(rows) - i
+            break
+        line = prefix + body
+        output.append(line)
+        remaining -= len(line) + 1
+
+    if left_out:
+        # Make room for the note by giving up the last results if needed
+        while len(output) > 1 and len(f"(+{left_out} more, budget exhausted)") + 1 > remaining:
+            remaining += len(output.pop()) + 1
+            left_out += 1
+        note = f"(+{left_out} more, budget exhausted)"
+        if len(note) + 1 <= remaining:
+            output.append(note)
+
+    if footer:
+        output.append(footer)
+    return "\n".join(output)
+
+
+def write_jsonl(result, stream=sys.stdout):
+    """Stream results as JSON Lines: a header object, one object per result as it is materialized,
+    then a trailer {"end": true, "count": N[, "cursor": ...]}"""
+    header = {key: value for key, value in result.items() if key not in ("results", "count", "cursor")}
+    stream.write(json.dumps(header, ensure_ascii=False) + "\n")
+    stream.flush()
+    if "error" in result:
+        return
+    count = 0
+    for row in result.get("results", []):
+        stream.write(json.dumps(row, ensure_ascii=False) + "\n")
+        stream.flush()
+        count += 1
+    trailer = {"end": True, "count": count}
+    if result.get("cursor"):
+        trailer["cursor"] = result["cursor"]
+    stream.write(json.dumps(trailer, ensure_ascii=False) + "\n")
+    stream.flush()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="UI Pro Max Search")
-    parser.add_argument("query", help="Search query")
+    parser.add_argument("query", nargs="?", help="Search query")
     parser.add_argument("--domain", "-d", choices=list(CSV_CONFIG.keys()), help="Search domain")
-    parser.add_argument("--stack", "-s", choices=AVAILABLE_STACKS, help="Stack-specific search")
+    parser.add_argument("--stack", "-s", help="Stack-specific search; comma-separate several to rank them together (e.g. nextjs,shadcn)")
     parser.add_argument("--pattern", "-p", action="store_true", help="Search cross-platform patterns")
     parser.add_argument("--platform", choices=AVAILABLE_PLATFORMS, help="Platform-specific search")
     parser.add_argument("--token", "-t", choices=AVAILABLE_TOKENS, help="Design token search")
-    parser.add_argument("--max-results", "-n", type=int, default=MAX_RESULTS, help="Max results (default: 3)")
+    parser.add_argument("--max-results", "-n", type=int, help="Max results (default: 3)")
+    parser.add_argument("--engine", "-e", choices=ENGINES, default="bm25", help="Ranking engine (default: bm25)")
+    parser.add_argument("--explain", action="store_true", help="Attach per-result score breakdown (term tf/idf/contribution, matched columns)")
+    parser.add_argument("--full", action="store_true", help="Show whole values instead of snippets around the matched terms")
+    parser.add_argument("--highlight", action="store_true", help="With --json/--jsonl, attach matched character ranges per column (_matches)")
+    parser.add_argument("--where", "-w", action="append", metavar="COL=VALUE",
+                        help="Filter rows before ranking, repeatable (e.g. --where Severity=High,Critical)")
+    parser.add_argument("--near", action="store_true", help="Query is hex color(s): find the closest palettes")
+    parser.add_argument("--role", help="With --near, match only this palette role (Primary, CTA, Background, ...)")
+    parser.add_argument("--contrast", action="store_true", help="List color pairs failing WCAG contrast (query filters by name)")
+    parser.add_argument("--level", choices=["AA", "AAA"], default="AA", help="With --contrast, WCAG level (default: AA)")
+    parser.add_argument("--mode", choices=["light", "dark"], help="With --contrast, only this color mode")
+    parser.add_argument("--large-text", action="store_true", help="With --contrast, use large-text thresholds")
+    parser.add_argument("--all-pairs", action="store_true", help="With --contrast, check every foreground against every background")
+    parser.add_argument("--suggest", action="store_true", help="Autocomplete the query as a prefix")
+    parser.add_argument("--recommend", action="store_true", help="Full design-system recommendation for a product query (uses --stack)")
+    parser.add_argument("--compare", action="store_true", help="Side-by-side matrix of patterns and guidelines across all platforms")
+    parser.add_argument("--build-tokens", action="store_true", help="Compile design tokens to platform code")
+    parser.add_argument("--out", default="design-tokens", help="With --build-tokens, output directory (default: design-tokens)")
+    parser.add_argument("--target", help=f"With --build-tokens, comma-separated targets ({', '.join(TOKEN_TARGETS)})")
+    parser.add_argument("--facets", action="store_true", help="Value counts for categorical columns (optionally of query matches)")
+    parser.add_argument("--cursor", "-c", help="Fetch the next page of a previous search")
     parser.add_argument("--json", action="store_true", help="Output as JSON")
+    parser.add_argument("--jsonl", action="store_true", help="Output as JSON Lines (header + one line per result)")
+    parser.add_argument("--compact", action="store_true", help="Compact output within a size budget")
+    parser.add_argument("--budget", type=int, default=2000, help="Compact output budget (default: 2000)")
+    parser.add_argument("--budget-unit", choices=["chars", "tokens"], default="chars", help="Unit for --budget (default: chars)")
+    parser.add_argument("--fields", "-f", help="Comma-separated output columns to keep (e.g. \"Issue,Do,Don't\"); with --cursor, re-projects that page")
 
     args = parser.parse_args()
+    stacks = args.stack.split(",") if args.stack else []
+    for stack in stacks:
+        if stack not in AVAILABLE_STACKS:
+            parser.error(f"argument --stack/-s: invalid choice: '{stack}' (choose from {', '.join(AVAILABLE_STACKS)})")
+    if len(stacks) > 1 and (args.recommend or args.facets):
+        parser.error("--recommend and --facets take a single --stack")
+    if args.suggest:
+        scope = f"stack:{','.join(stacks)}" if stacks else f"token:{args.token}" if args.token else args.domain
+        result = suggest(args.query or "", scope, args.max_results or SUGGEST_LIMIT)
+        print(json.dumps(result, ensure_ascii=False, indent=2) if args.json else format_suggest(result))
+        sys.exit(0)
+    if args.build_tokens:
+        result = build_tokens(args.out, args.target.split(",") if args.target else None)
+        print(json.dumps(result, ensure_ascii=False, indent=2) if args.json else format_build(result))
+        sys.exit(0)
+    args.max_results = args.max_results or MAX_RESULTS
+    if args.query is None and not (args.cursor or args.facets or args.contrast or args.where):
+        parser.error("a query, --where, --cursor or --facets is required")
+    if args.query is None and args.where and not (args.cursor or args.facets or args.contrast):
+        args.query = ""  # Filter only: matching rows in table order
+    fields = args.fields.split(",") if args.fields else None
+    where = {}
+    for clause in args.where or []:
+        col, sep, value = clause.partition("=")
+        if not sep:
+            parser.error(f"--where expects COL=VALUE, got: {clause}")
+        where[col.strip()] = [v.strip() for v in value.split(",")]
 
-    # Priority: token > pattern > platform > stack > domain
-    if args.token:
-        result = search_tokens(args.query, args.token)
-    elif args.pattern:
-        result = search_pattern(args.query, args.max_results)
-    elif args.platform:
-        result = search_platform(args.query, args.platform, args.max_results)
-    elif args.stack:
-        result = search_stack(args.query, args.stack, args.max_results)
-    else:
-        result = search(args.query, args.domain, args.max_results)
+    if args.recommend:
+        result = recommend(args.query, args.stack or "html-tailwind", args.max_results, args.engine)
+        for section in result.get("sections", {}).values():
+            if section.get("cursor"):
+                save_cursor(section["cursor"])  # Every section prints its cursor
+        if args.json or args.jsonl:
+            print(json.dumps(result, ensure_ascii=False, indent=None if args.jsonl else 2))
+        else:
+            budget = args.budget * CHARS_PER_TOKEN if args.budget_unit == "tokens" else args.budget
+            print(format_recommend(result, budget if args.compact else None))
+        sys.exit(0)
+
+    if args.compare:
+        result = compare(args.query, args.max_results, args.engine)
+        if args.json or args.jsonl:
+            print(json.dumps(result, ensure_ascii=False, indent=None if args.jsonl else 2))
+        else:
+            print(format_compare(result))
+        sys.exit(0)
+
+    # Text output shows snippets around matches; JSON carries the ranges only on request
+    highlight = args.highlight if (args.json or args.jsonl) else not args.full
+
+    # Priority: facets > cursor > contrast > near > token > pattern > platform > stack > domain
+    if args.facets:
+        try:
+            result = facets(args.domain, args.query, args.stack, where or None)
+        except ValueError as e:
+            result = {"error": str(e)}
+        if args.json or args.jsonl:
+            print(json.dumps(result, ensure_ascii=False, indent=None if args.jsonl else 2))
+        else:
+            print(format_facets(result))
+        sys.exit(0)
+
+    stream = args.jsonl  # JSON Lines rows are written as they are materialized
+    try:
+        if args.cursor:
+            result = next_page(args.cursor, args.max_results, fields, stream)
+        elif args.contrast:
+            scope = "all" if args.all_pairs else "pairs"
+            result = audit_contrast(args.query, args.level, args.mode, args.large_text, scope, args.max_results)
+        elif args.near:
+            result = search_colors(args.query, args.max_results, args.role, fields)
+        elif args.token:
+            result = search_tokens(args.query, args.token)
+        elif args.pattern:
+            result = search_pattern(args.query, args.max_results, fields, where, args.engine, args.explain, highlight, stream)
+        elif args.platform:
+            result = search_platform(args.query, args.platform, args.max_results, fields, where, args.engine, args.explain, highlight, stream)
+        elif args.stack:
+            result = search_stack(args.query, stacks, args.max_results, fields, where, args.engine, args.explain, highlight, stream)
+        else:
+            result = search(args.query, args.domain, args.max_results, fields, where, args.engine, args.explain, highlight, stream)
+    except ValueError as e:  # Bad input such as an unknown --where column
+        result = {"error": str(e)}
 
-    if args.json:
-        import json
+    if result.get("cursor"):
+        save_cursor(result["cursor"])  # Only cursors that are printed outlive this process
+    if args.jsonl:
+        write_jsonl(result)
+    elif args.compact:
+        budget = args.budget * CHARS_PER_TOKEN if args.budget_unit == "tokens" else args.budget
+        print(format_compact(result, budget))
+    elif args.json:
         print(json.dumps(result, indent=2, ensure_ascii=False))
     else:
         print(format_output(result))
@@ -0,0 +1,38 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from bench import compare, summarize  # noqa: E402
+
+METRICS = ["throughput", "query.all", "query.style", "build.style"]
+
+
+def _run(revision, scale, jitter):
+    """History record whose samples are `scale` x a fixed profile (throughput divided instead)"""
+    metrics = {}
+    for name in METRICS:
+        samples = [(10 + jitter + i * 0.1) * (1 / scale if name == "throughput" else scale) for i in range(5)]
+        metrics[name] = summarize(samples)
+    return {"time": "2024-01-01T00:00:00", "revision": revision, "label": None,
+            "config": {"engine": "bm25", "rounds": 5, "queries": 10},
+            "env": {"fingerprint": "env"}, "metrics": metrics}
+
+
+class RunNoiseTest(unittest.TestCase):
+    def _regressions(self, baseline_rev, current_rev):
+        history = [_run(baseline_rev, 1.0, 0.0), _run(baseline_rev, 1.0, 0.2), _run(baseline_rev, 1.0, 0.1)]
+        current = _run(current_rev, 2.0, 0.0)
+        history.append(current)
+        return compare(history[2], current, history=history)["regressions"]
+
+    def test_slowdown_reported_when_current_shares_the_baseline_revision(self):
+        self.assertEqual(self._regressions("abc+", "abc+"), len(METRICS))
+
+    def test_same_result_as_with_distinct_revisions(self):
+        self.assertEqual(self._regressions("abc+", "abc+"), self._regressions("abc+", "def"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from core import ANALYZER_PIPELINES, BM25  # noqa: E402
+
+DOCUMENTS = [
+    "Card hover-lift shadow",
+    "Card Hover Lift hover:-translate-y-1 hover:shadow-md transition-all",
+    "Shadow on hover for the card",
+    "onValueChange handler fires on select",
+]
+
+
+class PhrasePositionsTest(unittest.TestCase):
+    def setUp(self):
+        self.bm25 = BM25(analyzer=ANALYZER_PIPELINES["code"])
+        self.bm25.fit(DOCUMENTS, positions=True)
+
+    def matches(self, query):
+        return self.bm25.constrain(query)
+
+    def test_split_parts_keep_their_word_positions(self):
+        self.assertEqual(self.matches('"card hover"'), [0, 1])
+        self.assertEqual(self.matches('"hover lift"'), [0, 1])
+        self.assertEqual(self.matches('"lift shadow"'), [0])
+
+    def test_phrase_across_a_colon_identifier(self):
+        self.assertEqual(self.matches('"hover shadow"'), [1])
+
+    def test_phrase_with_an_identifier_in_the_query(self):
+        self.assertEqual(self.matches('"hover-lift shadow"'), [0])
+        self.assertEqual(self.matches('"value change handler"'), [3])
+
+    def test_near_counts_word_positions(self):
+        self.assertEqual(self.matches("card NEAR/1 shadow"), [])
+        self.assertEqual(self.matches("card NEAR/3 shadow"), [0])
+
+
+if __name__ == "__main__":
+    unittest.main()
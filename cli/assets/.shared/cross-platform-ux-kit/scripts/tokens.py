@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+UI/UX Pro Max Tokens - compile design tokens to CSS, Tailwind, Swift and Dart
+
+Each token group (e.g. color.semantic, spacing.scale) is rendered into a
+per-target fragment keyed by the hash of its JSON subtree; fragments are cached
+under INDEX_DIR so an edit only re-renders the groups it touched.
+"""
+
+import re
+import json
+import time
+import hashlib
+from pathlib import Path
+
+from core import DATA_DIR, INDEX_DIR, TOKEN_FILES
+
+# Bump when rendering changes so stale fragments are not reused
+COMPILER_VERSION = "1"
+
+# Compiled groups: (token file, group, name prefix, value kind, tailwind theme key).
+# Reference-valued groups (typography.semantic, motion.presets), keyframes and the
+# per-platform notes are documentation rather than values and are not compiled.
+TOKEN_GROUPS = [
+    ("color", "semantic", "color", "color", "colors"),
+    ("color", "palette", "color", "color", "colors"),
+    ("color", "opacity", "opacity", "number", "opacity"),
+    ("spacing", "scale", "spacing", "dimension", "spacing"),
+    ("spacing", "semantic", "space", "dimension", "spacing"),
+    ("typography", "scale", "font-size", "font-size", "fontSize"),
+    ("typography", "weight", "font-weight", "font-weight", "fontWeight"),
+    ("typography", "tracking", "tracking", "em", "letterSpacing"),
+    ("typography", "leading", "leading", "number", "lineHeight"),
+    ("motion", "duration", "duration", "duration", "transitionDuration"),
+    ("motion", "easing", "easing", "easing", "transitionTimingFunction"),
+]
+
+# Target -> output file name
+TOKEN_TARGETS = {
+    "css": "tokens.css",
+    "tailwind": "tailwind.tokens.js",
+    "swift": "DesignTokens.swift",
+    "dart": "design_tokens.dart",
+}
+
+_GENERATED = "Generated from cross-platform/tokens - do not edit"
+
+
+# ============ TOKEN EXTRACTION ============
+def _flatten(node, path=()):
+    """Yield (path, record) for every token in a group subtree"""
+    if not isinstance(node, dict):
+        yield path, {"value": node}
+    elif "light" in node and "dark" in node:
+        yield path, {"value": node["light"], "dark": node["dark"]}
+    elif "value" in node or "size" in node:
+        yield path, node
+    else:
+        for key, child in node.items():
+            yield from _flatten(child, path + (str(key),))
+
+
+def _css_name(prefix, path):
+    """--prefix-path-parts (dots become underscores: spacing 0.5 -> --spacing-0_5)"""
+    return "--" + "-".join((prefix,) + path).replace(".", "_").replace(" ", "-")
+
+
+def _ident(prefix, path):
+    """camelCase identifier for Swift/Dart (font-size + 2xl -> fontSize2xl)"""
+    words = [w for part in (prefix,) + path for w in re.split(r'[^A-Za-z0-9_]+', part.replace(".", "_")) if w]
+    return words[0] + "".join(w[:1].upper() + w[1:] for w in words[1:])
+
+
+def _number(value):
+    """Numeric part of a CSS value ('16px' -> '16', '-0.05em' -> '-0.05')"""
+    match = re.match(r'^\s*(-?[0-9.]+)', str(value))
+    return match.group(1) if match else "0"
+
+
+def _hex(value):
+    """'#abc' / '#aabbcc' -> 'AABBCC'"""
+    value = value.lstrip("#")
+    if len(value) == 3:
+        value = "".join(c * 2 for c in value)
+    return value.upper()
+
+
+# ============ RENDERERS ============
+# Each renderer maps one group to {section: [lines]}; sections are merged in order when assembling
+
+def _render_css(prefix, kind, tokens):
+    root, dark = [], []
+    for path, record in tokens:
+        name = _css_name(prefix, path)
+        if kind == "font-size":
+            root.append(f"  {name}: {record['size']};")
+            root.append(f"  {_css_name('line-height', path)}: {record['lineHeight']};")
+            continue
+        root.append(f"  {name}: {record['value']};")
+        if "dark" in record:
+            dark.append(f"  {name}: {record['dark']};")
+    return {":root": root, ".dark": dark}
+
+
+def _render_tailwind(prefix, kind, tokens, theme_key):
+    lines = []
+    for path, record in tokens:
+        key = "-".join(path)
+        if "dark" in record:
+            value = f"var({_css_name(prefix, path)})"
+        elif kind == "font-size":
+            value = [record["size"], {"lineHeight": record["lineHeight"]}]
+        else:
+            value = str(record.get("value"))
+        lines.append(f"        {json.dumps(key)}: {json.dumps(value)},")
+    return {theme_key: lines}
+
+
+def _render_swift(prefix, kind, tokens):
+    lines = []
+    for path, record in tokens:
+        name = _ident(prefix, path)
+        native = record.get("swiftui")
+        if kind == "color":
+            if "dark" in record:
+                value = f"Color(light: 0x{_hex(record['value'])}, dark: 0x{_hex(record['dark'])})"
+            else:
+                value = f"Color(hex: 0x{_hex(record['value'])})"
+            lines.append(f"    static let {name} = {value}")
+        elif kind == "font-size":
+            lines.append(f"    static let {name}: CGFloat = {_number(record['size'])}")
+            lines.append(f"    static let {_ident('line-height', path)}: CGFloat = {_number(record['lineHeight'])}")
+            if native:
+                lines.append(f"    static let {_ident('text-style', path)}: Font = {native}")
+        elif kind == "font-weight":
+            lines.append(f"    static let {name}: Font.Weight = {native}")
+        elif kind == "duration":
+            value = native or float(_number(record["value"])) / 1000
+            lines.append(f"    static let {name}: TimeInterval = {value}")
+        elif kind == "easing":
+            lines.append(f"    static let {name}: Animation = {native}")
+        elif kind == "em":
+            lines.append(f"    static let {name}: CGFloat = {_number(record['value'])} // em")
+        elif kind == "dimension":
+            lines.append(f"    static let {name}: CGFloat = {native or _number(record['value'])}")
+        else:
+            lines.append(f"    static let {name}: Double = {_number(record['value'])}")
+    return {"body": lines}
+
+
+def _render_dart(prefix, kind, tokens):
+    lines = []
+    for path, record in tokens:
+        name = _ident(prefix, path)
+        native = record.get("flutter")
+        if kind == "color":
+            lines.append(f"  static const Color {name} = Color(0xFF{_hex(record['value'])});")
+            if "dark" in record:
+                lines.append(f"  static const Color {name}Dark = Color(0xFF{_hex(record['dark'])});")
+        elif kind == "font-size":
+            comment = f" // TextTheme.{native}" if native else ""
+            lines.append(f"  static const double {name} = {_number(record['size'])};{comment}")
+            lines.append(f"  static const double {_ident('line-height', path)} = {_number(record['lineHeight'])};")
+        elif kind == "font-weight":
+            lines.append(f"  static const FontWeight {name} = {native};")
+        elif kind == "duration":
+            value = native or f"Duration(milliseconds: {_number(record['value'])})"
+            lines.append(f"  static const Duration {name} = {value};")
+        elif kind == "easing":
+            lines.append(f"  static const Curve {name} = {native};")
+        elif kind == "em":
+            lines.append(f"  static const double {name} = {_number(record['value'])}; // em")
+        elif kind == "dimension":
+            lines.append(f"  static const double {name} = {native or _number(record['value'])};")
+        else:
+            lines.append(f"  static const double {name} = {_number(record['value'])};")
+    return {"body": lines}
+
+
+def _render(target, prefix, kind, theme_key, subtree):
+    """Render one group for one target"""
+    tokens = list(_flatten(subtree))
+    if target == "css":
+        return _render_css(prefix, kind, tokens)
+    if target == "tailwind":
+        return _render_tailwind(prefix, kind, tokens, theme_key)
+    if target == "swift":
+        return _render_swift(prefix, kind, tokens)
+    return _render_dart(prefix, kind, tokens)
+
+
+def _assemble(target, fragments):
+    """Join group fragments into the final file for a target"""
+    sections = {}
+    for fragment in fragments:
+        for section, lines in fragment.items():
+            sections.setdefault(section, []).extend(lines)
+
+    if target == "css":
+        out = [f"/* {_GENERATED} */", ":root {", *sections.get(":root", []), "}"]
+        if sections.get(".dark"):
+            out += ["", ".dark {", *sections[".dark"], "}"]
+        return "\n".join(out) + "\n"
+
+    if target == "tailwind":
+        out = [f"// {_GENERATED}", "module.exports = {", "  theme: {", "    extend: {"]
+        for theme_key, lines in sections.items():
+            out += [f"      {theme_key}: {{", *lines, "      },"]
+        return "\n".join(out + ["    },", "  },", "};"]) + "\n"
+
+    if target == "swift":
+        return "\n".join([
+            f"// {_GENERATED}",
+            "import SwiftUI",
+            "",
+            "extension Color {",
+            "    init(hex: UInt32) {",
+            "        self.init(red: Double((hex >> 16) & 0xFF) / 255, green: Double((hex >> 8) & 0xFF) / 255, blue: Double(hex & 0xFF) / 255)",
+            "    }",
+            "",
+            "    init(light: UInt32, dark: UInt32) {",
+            "        self.init(UIColor { $0.userInterfaceStyle == .dark ? UIColor(Color(hex: dark)) : UIColor(Color(hex: light)) })",
+            "    }",
+            "}",
+            "",
+            "enum DesignTokens {",
+            *sections.get("body", []),
+            "}",
+        ]) + "\n"
+
+    return "\n".join([
+        f"// {_GENERATED}",
+        "import 'package:flutter/material.dart';",
+        "",
+        "class DesignTokens {",
+        "  DesignTokens._();",
+        "",
+        *sections.get("body", []),
+        "}",
+    ]) + "\n"
+
+
+# ============ INCREMENTAL BUILD ============
+def _subtree_hash(subtree):
+    payload = json.dumps(subtree, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(f"{COMPILER_VERSION}:{payload}".encode()).hexdigest()[:20]
+
+
+class TokenBuilder:
+    """Content-hash cache of rendered group fragments, persisted under INDEX_DIR/tokens"""
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = Path(cache_dir or INDEX_DIR / "tokens")
+        self.fragments = {}
+        self.parsed = {}
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.cache_dir / "manifest.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"files": {}, "outputs": {}}
+
+    def _save_manifest(self):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_dir / "manifest.json", "w", encoding="utf-8") as f:
+                json.dump(self.manifest, f)
+        except OSError:
+            pass
+
+    def _group_hashes(self, name):
+        """{group: hash} for a token file; reparsed only when its size/mtime changes"""
+        filepath = DATA_DIR / TOKEN_FILES[name]
+        stat = filepath.stat()
+        stamp = [stat.st_size, stat.st_mtime_ns]
+        cached = self.manifest["files"].get(name)
+        if cached and cached["stamp"] == stamp:
+            return cached["groups"]
+        with filepath.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        groups = {group: _subtree_hash(subtree) for group, subtree in data.items()}
+        self.parsed[name] = data
+        self.manifest["files"][name] = {"stamp": stamp, "groups": groups}
+        return groups
+
+    def _subtree(self, name, group):
+        if name not in self.parsed:
+            with (DATA_DIR / TOKEN_FILES[name]).open("r", encoding="utf-8") as f:
+                self.parsed[name] = json.load(f)
+        return self.parsed[name][group]
+
+    def _fragment(self, target, name, group, prefix, kind, theme_key, digest, stats):
+        key = f"{target}-{name}.{group}-{digest}"
+        if key in self.fragments:
+            stats["cached"] += 1
+            return self.fragments[key]
+        path = self.cache_dir / "fragments" / f"{key}.json"
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                fragment = json.load(f)
+            stats["cached"] += 1
+        except (OSError, ValueError):
+            fragment = _render(target, prefix, kind, theme_key, self._subtree(name, group))
+            stats["built"] += 1
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                with open(path, "w", encoding="utf-8") as f:
+                    json.dump(fragment, f)
+            except OSError:
+                pass
+        self.fragments[key] = fragment
+        return fragment
+
+    def build(self, out_dir, targets=None):
+        """Write the requested targets to out_dir, touching only outputs whose inputs changed"""
+        started = time.perf_counter()
+        targets = targets or list(TOKEN_TARGETS)
+        unknown = [t for t in targets if t not in TOKEN_TARGETS]
+        if unknown:
+            return {"error": f"Unknown target: {', '.join(unknown)}. Available: {', '.join(TOKEN_TARGETS)}"}
+
+        self.parsed = {}
+        hashes = {}
+        for name in dict.fromkeys(g[0] for g in TOKEN_GROUPS):
+            if not (DATA_DIR / TOKEN_FILES[name]).exists():
+                return {"error": f"Token file not found: {TOKEN_FILES[name]}"}
+            hashes[name] = self._group_hashes(name)
+
+        out_dir = Path(out_dir)
+        stats = {"built": 0, "cached": 0}
+        outputs = {}
+        for target in targets:
+            groups = [g for g in TOKEN_GROUPS if g[1] in hashes[g[0]]]
+            digest = hashlib.sha256(":".join(
+                [target] + [hashes[name][group] for name, group, *_ in groups]).encode()).hexdigest()[:20]
+            outfile = out_dir / TOKEN_TARGETS[target]
+            key = str(outfile.resolve())  # The same output reached from any working directory
+            recorded = self.manifest["outputs"].get(key)
+            if recorded == digest and outfile.exists():
+                outputs[target] = {"file": str(outfile), "changed": False}
+                continue
+            fragments = [self._fragment(target, name, group, prefix, kind, theme_key, hashes[name][group], stats)
+                         for name, group, prefix, kind, theme_key in groups]
+            out_dir.mkdir(parents=True, exist_ok=True)
+            outfile.write_text(_assemble(target, fragments), encoding="utf-8")
+            self.manifest["outputs"][key] = digest
+            outputs[target] = {"file": str(outfile), "changed": True}
+
+        self._save_manifest()
+        return {
+            "domain": "build",
+            "out_dir": str(out_dir),
+            "outputs": outputs,
+            "fragments": stats,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+
+_BUILDER = None
+
+
+def build_tokens(out_dir="design-tokens", targets=None):
+    """Compile tokens/*.json to CSS variables, a Tailwind theme, Swift and Dart constants"""
+    global _BUILDER
+    if _BUILDER is None:
+        _BUILDER = TokenBuilder()
+    return _BUILDER.build(out_dir, targets)